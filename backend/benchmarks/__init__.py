@@ -0,0 +1 @@
+"""Offline benchmark suite for the caption request path (python -m benchmarks)"""
@@ -0,0 +1,117 @@
+"""
+Command-line entry point for the benchmark suite.
+
+    python -m benchmarks run [--output FILE] [--only NAME ...] [--rows 10000,100000]
+    python -m benchmarks compare BASELINE CURRENT [--threshold 0.10]
+
+`run` writes a JSON results file; `compare` exits with status 1 when any
+benchmark's median got slower than the baseline by more than the threshold.
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, Any
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'latest.json')
+DEFAULT_ROWS = '10000,100000,1000000'
+
+
+def _format_time(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.3f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f}ms"
+    return f"{seconds * 1e6:.2f}µs"
+
+
+def run(args) -> int:
+    from .harness import setup_django, environment_info
+    setup_django()
+    from .cases import BENCHMARKS
+    from captions.services.latency_analytics import latency_recorder
+
+    unknown = [name for name in args.only if name not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmark(s): {', '.join(unknown)}", file=sys.stderr)
+        print(f"Available: {', '.join(BENCHMARKS)}", file=sys.stderr)
+        return 2
+
+    options = {
+        'rows': [int(value) for value in args.rows.split(',') if value.strip()],
+    }
+
+    results: Dict[str, Any] = {}
+    for name, fn in BENCHMARKS.items():
+        if args.only and name not in args.only:
+            continue
+        print(f"▶ {name}", flush=True)
+        for case, stats in fn(options).items():
+            results[case] = stats
+            print(f"  {case:<50} {_format_time(stats['median']):>12}", flush=True)
+        # Write buffered latency samples outside the timed sections
+        latency_recorder.flush()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as fh:
+        json.dump({'environment': environment_info(), 'results': results}, fh, indent=2, sort_keys=True)
+    print(f"\nResults written to {args.output}")
+    return 0
+
+
+def compare(args) -> int:
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)['results']
+    with open(args.current) as fh:
+        current = json.load(fh)['results']
+
+    regressions = []
+    print(f"{'benchmark':<50} {'baseline':>12} {'current':>12} {'change':>9}")
+    for case in sorted(set(baseline) | set(current)):
+        if case not in baseline or case not in current:
+            status = 'new' if case not in baseline else 'missing'
+            print(f"{case:<50} {status:>12}")
+            continue
+
+        before = baseline[case]['median']
+        after = current[case]['median']
+        change = (after - before) / before if before else 0.0
+        flag = ''
+        if change > args.threshold:
+            flag = '  ⚠ REGRESSION'
+            regressions.append(case)
+        print(f"{case:<50} {_format_time(before):>12} {_format_time(after):>12} {change:>+8.1%}{flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run benchmarks and write a results file')
+    run_parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Results JSON path')
+    run_parser.add_argument('--only', nargs='*', default=[], help='Benchmark names to run')
+    run_parser.add_argument('--rows', default=DEFAULT_ROWS,
+                            help='Comma-separated table sizes for analytics_summary')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser('compare', help='Compare two results files')
+    compare_parser.add_argument('baseline', help='Baseline results JSON')
+    compare_parser.add_argument('current', help='Current results JSON')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='Allowed slowdown as a fraction (default: 0.10)')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
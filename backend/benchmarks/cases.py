@@ -0,0 +1,351 @@
+"""
+Benchmark cases for the caption request path.
+
+Each registered benchmark receives the run options and returns a mapping of
+result name -> timing statistics (see harness.measure). Result names carry
+their parameters, e.g. ``serializer_validation[words=100]``.
+"""
+
+import json
+import random
+from datetime import timedelta
+from typing import Callable, Dict, Any
+
+from .harness import install_stub_model, make_caption_payload, measure
+
+BENCHMARKS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Dict[str, Any]]]] = {}
+
+# keyLearnings sizes (in words) used for the input-size sweeps
+INPUT_SIZES = (10, 100, 1000)
+
+# Roughly the size of a 'long' generated caption
+STUB_LONG_CAPTION = ' '.join(['Insightful words about the event and its lessons.'] * 60)
+
+
+def benchmark(name: str):
+    """Register a benchmark function under `name`"""
+    def decorator(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return decorator
+
+
+@benchmark('serializer_validation')
+def bench_serializer_validation(options):
+    from captions.serializers import CaptionRequestSerializer
+
+    results = {}
+    for words in INPUT_SIZES:
+        payload = make_caption_payload(words)
+
+        def run():
+            serializer = CaptionRequestSerializer(data=payload)
+            serializer.is_valid()
+
+        results[f'serializer_validation[words={words}]'] = measure(run, number=500)
+    return results
+
+
+@benchmark('fast_validation')
+def bench_fast_validation(options):
+    from captions.schemas import validate_caption_request
+
+    results = {}
+    for words in INPUT_SIZES:
+        payload = make_caption_payload(words)
+        results[f'fast_validation[words={words}]'] = measure(
+            lambda: validate_caption_request(payload), number=5000
+        )
+    return results
+
+
+@benchmark('create_advanced_prompt')
+def bench_create_advanced_prompt(options):
+    from captions import views
+
+    generator = views.caption_generator
+    results = {}
+    for words in INPUT_SIZES:
+        payload = make_caption_payload(words, language='tanglish')
+        results[f'create_advanced_prompt[words={words}]'] = measure(
+            lambda: generator._create_advanced_prompt(payload), number=1000
+        )
+    return results
+
+
+@benchmark('detect_field_context')
+def bench_detect_field_context(options):
+    from captions import views
+
+    generator = views.caption_generator
+    results = {}
+    for words in INPUT_SIZES:
+        learnings = make_caption_payload(words)['keyLearnings']
+        results[f'detect_field_context[words={words}]'] = measure(
+            lambda: generator._detect_field_context('conference', learnings), number=1000
+        )
+    return results
+
+
+@benchmark('template_caption')
+def bench_template_caption(options):
+    from captions import views
+
+    generator = views.caption_generator
+    results = {}
+    for length in ('short', 'long'):
+        payload = make_caption_payload(100, length=length)
+        results[f'template_caption[length={length}]'] = measure(
+            lambda: generator.compose_template_caption(payload, 'requested'), number=1000
+        )
+    return results
+
+
+@benchmark('generate_caption_endpoint')
+def bench_generate_caption_endpoint(options):
+    from django.test import Client
+
+    client = Client()
+    results = {}
+    for length in ('short', 'long'):
+        body = json.dumps(make_caption_payload(30, length=length))
+
+        def run():
+            response = client.post('/api/generate-caption/', body, content_type='application/json')
+            assert response.status_code == 200, response.content
+
+        results[f'generate_caption_endpoint[length={length}]'] = measure(run, number=100)
+    return results
+
+
+@benchmark('caption_refinement')
+def bench_caption_refinement(options):
+    from django.test import Client
+    from captions import views
+
+    generator = views.caption_generator
+    client = Client()
+    results = {}
+    for words in INPUT_SIZES:
+        payload = make_caption_payload(words)
+        response = client.post('/api/generate-caption/', json.dumps(payload), content_type='application/json')
+        session = views.caption_sessions.get(response.json()['session_id'])
+
+        # Characters sent upstream: full prompt vs compact context + last caption + delta
+        fresh = generator._add_randomization_elements(generator._create_advanced_prompt(session.caption_input))
+        delta = session.history(generator._create_refinement_instruction(
+            session.caption_input, session.caption_input.replace(vibe=90), 'make it shorter'
+        ))
+        prompt_chars = {
+            'fresh': len(fresh),
+            'refine': sum(len(part) for turn in delta for part in turn['parts']),
+        }
+
+        url = f'/api/captions/{session.session_id}/refine/'
+        body = json.dumps({'instruction': 'make it shorter', 'vibe': 90})
+
+        def run():
+            session.turns = 0
+            response = client.post(url, body, content_type='application/json')
+            assert response.status_code == 200, response.content
+
+        stats = measure(run, number=100)
+        stats['prompt_chars'] = prompt_chars
+        results[f'caption_refinement[words={words}]'] = stats
+    return results
+
+
+@benchmark('event_loop_overhead')
+def bench_event_loop_overhead(options):
+    import asyncio
+    from captions import views
+    from captions.services.event_loop import run_coroutine
+    from .harness import StubModel, StubResponse
+
+    class AsyncStubModel(StubModel):
+        """Stub with the async client method the Gemini model exposes"""
+
+        async def generate_content_async(self, prompt, **kwargs):
+            self.calls += 1
+            return StubResponse(self.text)
+
+    async def noop():
+        return None
+
+    router = views.caption_generator.router
+    payload = make_caption_payload(30)
+    prompt = views.caption_generator._create_advanced_prompt(payload)
+    results = {}
+    for runner_name, runner in (('asyncio_run', asyncio.run), ('background_loop', run_coroutine)):
+        results[f'event_loop_overhead[noop,{runner_name}]'] = measure(lambda: runner(noop()), number=500)
+        for model_name, model in (('sync_model', StubModel()), ('async_model', AsyncStubModel())):
+            for handle in router.handles:
+                handle.model = model
+            results[f'event_loop_overhead[router,{model_name},{runner_name}]'] = measure(
+                lambda: runner(router.generate(prompt, 'medium')), number=500
+            )
+    install_stub_model()
+    return results
+
+
+def _caption_request_rows(count: int, start_index: int = 0):
+    """Yield unsaved CaptionRequest rows spread over the last 30 days"""
+    from django.utils import timezone
+    from captions.models import CaptionRequest
+
+    rng = random.Random(start_index)
+    now = timezone.now()
+    event_types = ['Conference', 'Workshop', 'Hackathon', 'Meetup', 'Webinar']
+    payload = make_caption_payload(40)
+    for i in range(start_index, start_index + count):
+        yield CaptionRequest(
+            event_name=f"{payload['eventName']} #{i}",
+            event_type=rng.choice(event_types),
+            location=payload['location'],
+            speakers=payload['speakers'],
+            key_learnings=payload['keyLearnings'],
+            length=rng.choice(['short', 'medium', 'long']),
+            vibe=rng.randint(0, 100),
+            language=rng.choice(['english', 'tanglish']),
+            generated_caption=STUB_LONG_CAPTION,
+            success=rng.random() > 0.05,
+            error_message='',
+            processing_time=rng.uniform(0.5, 8.0),
+            created_at=now - timedelta(seconds=rng.randint(0, 29 * 86400)),
+            ip_address='127.0.0.1',
+        )
+
+
+@benchmark('caption_request_insert')
+def bench_caption_request_insert(options):
+    from captions.models import CaptionRequest
+
+    rows = iter(_caption_request_rows(10 ** 7, start_index=10 ** 8))
+
+    def run():
+        next(rows).save(force_insert=True)
+
+    result = measure(run, number=500)
+    CaptionRequest.objects.all().delete()
+    return {'caption_request_insert': result}
+
+
+@benchmark('analytics_summary')
+def bench_analytics_summary(options):
+    from django.test import Client
+    from captions.models import CaptionRequest
+
+    client = Client()
+    results = {}
+    seeded = CaptionRequest.objects.count()
+    for rows in options['rows']:
+        missing = rows - seeded
+        batch = 10000
+        while missing > 0:
+            chunk = min(batch, missing)
+            CaptionRequest.objects.bulk_create(_caption_request_rows(chunk, start_index=seeded), batch_size=1000)
+            seeded += chunk
+            missing -= chunk
+
+        def run():
+            response = client.get('/api/analytics/')
+            assert response.status_code == 200, response.content
+
+        number = max(1, 100000 // rows)
+        results[f'analytics_summary[rows={rows}]'] = measure(run, number=number, repeat=3)
+    CaptionRequest.objects.all().delete()
+    return results
+
+
+def _typical_responses():
+    """Response payloads shaped like the API's real responses"""
+    import uuid
+    from django.utils import timezone
+
+    long_caption = ' '.join(
+        ['Three game-changing insights from the summit: ship small, measure everything 🚀.'] * 50
+    )
+    return {
+        'caption': {
+            'success': True,
+            'caption': long_caption,
+            'processing_time': 2.3418,
+            'queue_time': 0.0125,
+            'generation_time': 2.3293,
+            'request_id': uuid.uuid4(),
+            'debug_message': 'Generated using casual vibe',
+        },
+        'analytics': {
+            'success': True,
+            'analytics': {
+                'total_requests': 124890,
+                'successful_requests': 121002,
+                'failed_requests': 3888,
+                'avg_processing_time': 3.2841,
+                'popular_event_types': [
+                    {'event_type': name, 'count': 1000 - i} for i, name in
+                    enumerate(['Conference', 'Workshop', 'Hackathon', 'Meetup', 'Webinar'])
+                ],
+                'popular_vibes': [{'vibe': v, 'count': 500 - v} for v in (50, 75, 25, 90, 10)],
+                'period': '30 days',
+            },
+        },
+        'batch': {
+            'success': True,
+            'results': [
+                {'caption': long_caption[:1500], 'request_id': uuid.uuid4(), 'created_at': timezone.now()}
+                for _ in range(20)
+            ],
+        },
+    }
+
+
+@benchmark('response_rendering')
+def bench_response_rendering(options):
+    import gzip
+    from rest_framework.renderers import JSONRenderer
+    from captions.renderers import FastJSONRenderer
+
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    results = {}
+    for name, payload in _typical_responses().items():
+        for label, renderer in (('stock', JSONRenderer()), ('fast', FastJSONRenderer())):
+            stats = measure(lambda: renderer.render(payload), number=2000)
+            body = renderer.render(payload)
+            stats['bytes'] = {
+                'identity': len(body),
+                'gzip': len(gzip.compress(body, compresslevel=6)),
+            }
+            if brotli is not None:
+                stats['bytes']['br'] = len(brotli.compress(body, quality=4))
+            results[f'response_rendering[{name},{label}]'] = stats
+    return results
+
+
+@benchmark('latency_percentiles')
+def bench_latency_percentiles(options):
+    from django.utils import timezone
+    from captions.models import CaptionAnalytics
+    from captions.services.latency_analytics import latency_percentiles, record_latencies
+
+    rng = random.Random(7)
+    today = timezone.now().date()
+    for offset in range(365):
+        samples = [
+            (rng.lognormvariate(1, 0.6), rng.randint(0, 100), rng.choice(['short', 'medium', 'long']), 'ok')
+            for _ in range(500)
+        ]
+        record_latencies(today - timedelta(days=offset), samples)
+
+    results = {}
+    for days in (1, 30, 365):
+        start = today - timedelta(days=days - 1)
+        results[f'latency_percentiles[days={days}]'] = measure(
+            lambda: latency_percentiles(start), number=20, repeat=3
+        )
+    CaptionAnalytics.objects.all().delete()
+    return results
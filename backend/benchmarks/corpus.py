@@ -0,0 +1,179 @@
+"""
+Synthetic but realistic caption dataset for storage benchmarks.
+
+Rows mimic what the API stores: varied events, speaker lists, free-form
+highlights and generated captions in the structure the model is prompted
+for (hook, context, insights, reflection, call to action, hashtags), at the
+three caption lengths. Everything is driven by a seeded RNG, so a seed
+always produces the same rows.
+"""
+
+import random
+from typing import Dict, Any, Iterator, List
+
+EVENTS = [
+    ('Tech Innovation Summit', 'Conference'), ('PyCon India', 'Conference'),
+    ('Smart India Hackathon', 'Hackathon'), ('Google I/O Extended', 'Meetup'),
+    ('AWS Community Day', 'Conference'), ('Design Thinking Bootcamp', 'Workshop'),
+    ('Women in Tech Leadership Forum', 'Panel'), ('Startup Pitch Night', 'Networking'),
+    ('Data Science Day', 'Workshop'), ('Product Management Masterclass', 'Webinar'),
+    ('Cloud Native Meetup', 'Meetup'), ('National Research Symposium', 'Seminar'),
+    ('Campus Placement Drive', 'Career Fair'), ('Open Source Sprint', 'Hackathon'),
+    ('Fintech Leaders Roundtable', 'Panel'), ('Annual Alumni Meet', 'Networking'),
+]
+
+LOCATIONS = [
+    'Chennai Trade Centre', 'IIT Madras Research Park', 'Bengaluru International Exhibition Centre',
+    'Hyderabad HITEX', 'Coimbatore CODISSIA', 'Online', 'Mumbai Jio World Centre',
+    'Pune Hinjewadi Tech Park', 'Anna University, Chennai', 'Kochi Infopark',
+]
+
+FIRST_NAMES = [
+    'Priya', 'Arjun', 'Karthik', 'Divya', 'Rahul', 'Sneha', 'Vikram', 'Ananya', 'Meera',
+    'Suresh', 'Lakshmi', 'Naveen', 'Deepa', 'Harish', 'Kavya', 'Aditya', 'Nisha', 'Rohan',
+]
+LAST_NAMES = [
+    'Raman', 'Kumar', 'Iyer', 'Sharma', 'Nair', 'Reddy', 'Menon', 'Krishnan', 'Subramanian',
+    'Patel', 'Rao', 'Venkatesh', 'Balaji', 'Srinivasan',
+]
+TITLES = ['CTO at', 'Head of Engineering,', 'Founder of', 'Professor,', 'Product Lead at', 'VP Data,']
+COMPANIES = ['Zoho', 'Freshworks', 'Infosys', 'TCS', 'Google', 'Microsoft', 'Razorpay', 'Swiggy', 'IIT Madras']
+
+LEARNING_SENTENCES = [
+    "Building AI products starts with understanding the user problem, not the model",
+    "Ship small iterations and measure everything before scaling",
+    "Open source contributions are the fastest way to grow as an engineer",
+    "Great teams are built on psychological safety and clear ownership",
+    "Data quality matters more than model complexity",
+    "Cloud costs need to be treated as a product metric",
+    "Mentorship accelerates careers more than any certification",
+    "Design systems help small teams move fast without breaking consistency",
+    "Founders should talk to customers every single week",
+    "Research impact comes from collaboration across disciplines",
+    "Communication skills are as important as technical skills",
+    "Security has to be part of the development process from day one",
+    "Networking is about giving value before asking for anything",
+    "Failure is data, and the best teams learn from it quickly",
+    "Accessibility should be a default, not an afterthought",
+]
+
+HOOKS = [
+    "Just wrapped up an incredible experience at {event}... 🚀",
+    "Key insights from {event} that every professional should know:",
+    "Had an amazing time at {event}! ✨",
+    "Still processing everything I learned at {event}...",
+    "Y'all, {event} just hit different! 🔥",
+    "What a journey at {event}! 💫",
+    "The most valuable takeaway from {event} wasn't what I expected.",
+    "Three game-changing insights from {event}:",
+]
+
+CONTEXT = [
+    "Last week I had the privilege of attending {event} at {location}, and it was packed with "
+    "brilliant minds, bold ideas and honest conversations.",
+    "Spent the day at {location} for {event}, surrounded by builders, researchers and "
+    "leaders who genuinely care about their craft.",
+    "{event} brought together some of the most inspiring people in our community at {location}.",
+    "When I signed up for {event}, I expected a few good talks. What I got was a completely "
+    "new perspective on how we build and grow.",
+]
+
+INSIGHT_INTROS = [
+    "Here are my key takeaways:", "A few things that really stood out for me:",
+    "What I'm taking back to my team:", "The lessons that stuck with me:",
+]
+
+INSIGHT_ELABORATIONS = [
+    "It sounds simple, but it changes how you prioritise every single week.",
+    "This was a powerful reminder that the fundamentals still matter most.",
+    "{speaker} shared a story about this that I'm still thinking about.",
+    "I've seen this play out in my own projects, and it's so true.",
+    "The best part? It's something anyone can start doing tomorrow.",
+    "Huge thanks to {speaker} for breaking this down so clearly.",
+]
+
+REFLECTIONS = [
+    "Events like this remind me why I love being part of this community. 🙏",
+    "Grateful to the organisers and everyone who made this possible.",
+    "I walked in curious and walked out with a notebook full of ideas.",
+    "Feeling inspired, energised and ready to put these insights into action!",
+]
+
+CALLS_TO_ACTION = [
+    "What's the biggest lesson you've learned from an event recently? Let me know in the comments 👇",
+    "Were you there too? Would love to connect and hear your takeaways!",
+    "If you're working on something similar, let's connect and exchange notes.",
+    "Which of these resonates with you the most? Drop your thoughts below!",
+]
+
+HASHTAGS = [
+    '#Technology', '#Innovation', '#Leadership', '#Learning', '#Networking', '#AI', '#Startups',
+    '#CareerGrowth', '#ProfessionalDevelopment', '#Community', '#OpenSource', '#DataScience',
+    '#ProductManagement', '#WomenInTech', '#Chennai', '#India', '#Growth', '#Engineering',
+]
+
+INSIGHTS_PER_LENGTH = {'short': 2, 'medium': 3, 'long': 5}
+MARKERS = ['🔹', '✅', '💡', '👉', '▪️']
+
+
+def _speakers(rng: random.Random) -> str:
+    people = []
+    for _ in range(rng.randint(1, 4)):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        if rng.random() < 0.5:
+            name = f"{name} ({rng.choice(TITLES)} {rng.choice(COMPANIES)})"
+        people.append(name)
+    return ', '.join(people)
+
+
+def _caption(rng: random.Random, event: str, location: str, speakers: str,
+             learnings: List[str], length: str) -> str:
+    speaker = speakers.split(',')[0].split(' (')[0]
+    marker = rng.choice(MARKERS)
+    insights = []
+    for learning in learnings[:INSIGHTS_PER_LENGTH[length]]:
+        insight = f"{marker} {learning}."
+        if length != 'short':
+            insight += ' ' + rng.choice(INSIGHT_ELABORATIONS).format(speaker=speaker)
+        if length == 'long':
+            insight += ' ' + rng.choice(INSIGHT_ELABORATIONS).format(speaker=speaker)
+        insights.append(insight)
+
+    sections = [
+        rng.choice(HOOKS).format(event=event),
+        rng.choice(CONTEXT).format(event=event, location=location),
+        rng.choice(INSIGHT_INTROS) + '\n\n' + '\n\n'.join(insights),
+    ]
+    if length == 'long':
+        sections.append(rng.choice(CONTEXT).format(event=event, location=location))
+    sections.extend([
+        rng.choice(REFLECTIONS),
+        rng.choice(CALLS_TO_ACTION),
+        ' '.join(rng.sample(HASHTAGS, rng.randint(5, 8))),
+    ])
+    return '\n\n'.join(sections)
+
+
+def caption_rows(count: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield `count` CaptionRequest-shaped dicts"""
+    rng = random.Random(seed)
+    for i in range(count):
+        name, event_type = rng.choice(EVENTS)
+        event = f"{name} {rng.choice([2023, 2024, 2025])}"
+        location = rng.choice(LOCATIONS)
+        speakers = _speakers(rng)
+        learnings = rng.sample(LEARNING_SENTENCES, 6)
+        length = rng.choice(['short', 'medium', 'long'])
+        yield {
+            'event_name': event,
+            'event_type': event_type,
+            'location': location,
+            'speakers': speakers,
+            'key_learnings': '. '.join(learnings[:rng.randint(3, 6)]) + '.',
+            'length': length,
+            'vibe': rng.randint(0, 100),
+            'language': rng.choice(['english', 'english', 'tanglish']),
+            'generated_caption': _caption(rng, event, location, speakers, learnings, length),
+            'success': True,
+            'processing_time': rng.lognormvariate(1, 0.5),
+        }
@@ -0,0 +1,170 @@
+"""
+Scenario harness for the model router using fake backends.
+
+    python -m benchmarks.router_harness
+
+Each scenario wires a ModelRouter to fake models with their own latency
+and error profiles, drives a stream of requests through it and checks the
+routing behaviour (which model served, cascades, budget exhaustion). Runs
+offline in a few seconds and exits non-zero if any scenario fails.
+"""
+
+import asyncio
+import random
+import sys
+import time
+from collections import Counter
+from typing import Callable, Dict, Any, List, Optional
+
+from .harness import BACKEND_DIR
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from captions.services.model_router import ModelHandle, ModelRouter, RoutingExhausted  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeBackend:
+    """Fake model with a configurable latency profile and error rate"""
+
+    def __init__(self, name: str, latency: Callable[[random.Random, str], float],
+                 error_rate: float = 0.0, seed: int = 0):
+        self.name = name
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def generate_content(self, prompt: str, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency(self.rng, prompt))
+        if self.rng.random() < self.error_rate:
+            raise RuntimeError(f"{self.name}: upstream error")
+        return FakeResponse(f"caption from {self.name}")
+
+
+def constant(seconds: float):
+    return lambda rng, prompt: seconds
+
+
+def jitter(low: float, high: float):
+    return lambda rng, prompt: rng.uniform(low, high)
+
+
+def by_length(profile: Dict[str, float]):
+    """Latency depending on the length tag embedded in the fake prompt"""
+    return lambda rng, prompt: profile[prompt]
+
+
+def build_router(backends: List[FakeBackend], budgets: Dict[str, float],
+                 timeout: float = 1.0, min_samples: int = 3) -> ModelRouter:
+    handles = [ModelHandle(b.name, b, timeout=timeout, window=20) for b in backends]
+    return ModelRouter(handles, latency_budgets=budgets, min_samples=min_samples)
+
+
+async def drive(router: ModelRouter, lengths: List[str]) -> List[Dict[str, Any]]:
+    """Send requests sequentially; returns one outcome per request"""
+    outcomes = []
+    for length in lengths:
+        try:
+            _, decision = await router.generate(length, length)
+            outcomes.append({'model': decision['model'], 'attempts': len(decision['attempts'])})
+        except RoutingExhausted as e:
+            outcomes.append({'model': None, 'timed_out': e.timed_out,
+                             'attempts': len(e.decision['attempts'])})
+    return outcomes
+
+
+def served(outcomes: List[Dict[str, Any]], last: Optional[int] = None) -> Counter:
+    return Counter(o['model'] for o in (outcomes[-last:] if last else outcomes))
+
+
+def scenario_healthy_primary():
+    """A healthy, fast primary serves everything"""
+    primary = FakeBackend('primary', jitter(0.005, 0.01))
+    secondary = FakeBackend('secondary', constant(0.005))
+    router = build_router([primary, secondary], {'short': 0.2, 'medium': 0.2, 'long': 0.2})
+    outcomes = asyncio.run(drive(router, ['short'] * 20))
+    assert served(outcomes) == {'primary': 20}, served(outcomes)
+    assert secondary.calls == 0
+
+
+def scenario_slow_primary_learned():
+    """Once the primary's p90 exceeds the budget, traffic moves to the fast model"""
+    primary = FakeBackend('primary', constant(0.08))
+    secondary = FakeBackend('secondary', constant(0.01))
+    router = build_router([primary, secondary], {'short': 0.05, 'medium': 0.05, 'long': 0.05}, timeout=0.2)
+    outcomes = asyncio.run(drive(router, ['short'] * 15))
+    # Cold start: primary times out, cascade to secondary; afterwards the
+    # primary is deprioritised and the secondary answers first time
+    assert outcomes[0]['model'] is None or outcomes[0]['attempts'] >= 1
+    assert served(outcomes, last=5) == {'secondary': 5}, served(outcomes, last=5)
+    assert all(o['attempts'] == 1 for o in outcomes[-5:])
+
+
+def scenario_length_aware():
+    """A model that is only slow for long captions keeps short traffic"""
+    profile = {'short': 0.005, 'medium': 0.01, 'long': 0.09}
+    primary = FakeBackend('primary', by_length(profile))
+    secondary = FakeBackend('secondary', constant(0.02))
+    router = build_router([primary, secondary], {'short': 0.05, 'medium': 0.05, 'long': 0.06}, timeout=0.2)
+    lengths = ['short', 'long'] * 10
+    outcomes = asyncio.run(drive(router, lengths))
+    tail = list(zip(lengths, outcomes))[-6:]
+    assert all(o['model'] == 'primary' for length, o in tail if length == 'short'), tail
+    assert all(o['model'] == 'secondary' for length, o in tail if length == 'long'), tail
+
+
+def scenario_erroring_primary_cascades():
+    """Errors cascade to the next model and a failing model is demoted"""
+    primary = FakeBackend('primary', constant(0.002), error_rate=1.0)
+    secondary = FakeBackend('secondary', constant(0.005))
+    router = build_router([primary, secondary], {'short': 0.2, 'medium': 0.2, 'long': 0.2})
+    outcomes = asyncio.run(drive(router, ['medium'] * 10))
+    assert served(outcomes) == {'secondary': 10}, served(outcomes)
+    assert outcomes[0]['attempts'] == 2
+    assert all(o['attempts'] == 1 for o in outcomes[-5:])
+    assert router.get_stats()['models']['primary']['error_rate'] == 1.0
+
+
+def scenario_budget_exhausted():
+    """When every model is too slow the router gives up within the budget"""
+    slow_a = FakeBackend('slow-a', constant(0.2))
+    slow_b = FakeBackend('slow-b', constant(0.2))
+    router = build_router([slow_a, slow_b], {'short': 0.05, 'medium': 0.05, 'long': 0.05})
+    start = time.monotonic()
+    outcomes = asyncio.run(drive(router, ['short'] * 3))
+    elapsed = time.monotonic() - start
+    assert all(o['model'] is None and o['timed_out'] for o in outcomes), outcomes
+    assert elapsed < 3 * 0.05 + 0.1, elapsed
+
+
+SCENARIOS = [
+    scenario_healthy_primary,
+    scenario_slow_primary_learned,
+    scenario_length_aware,
+    scenario_erroring_primary_cascades,
+    scenario_budget_exhausted,
+]
+
+
+def main() -> int:
+    failures = 0
+    for scenario in SCENARIOS:
+        try:
+            scenario()
+            print(f"✅ {scenario.__name__}: {scenario.__doc__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {scenario.__name__}: {scenario.__doc__}\n   {e!r}")
+    print(f"\n{len(SCENARIOS) - failures}/{len(SCENARIOS)} scenarios passed")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Storage report for the compressed caption text columns.
+
+    python -m benchmarks.storage_report [--rows 20000]
+
+Builds two SQLite files holding the same synthetic dataset (see
+benchmarks.corpus), one with the text columns stored as plain TEXT and one
+with them compressed by captions.compression, then reports file size and
+the time of the analytics scans that never read those columns. The corpus
+is generated from a few hundred phrases, so it compresses far better than
+real captions and its sizes are only useful for the scan timings. The
+held-out ratio, on hand-written captions that share no sentences with the
+corpus or the templates, is the figure to quote.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta
+
+from .corpus import caption_rows
+from .harness import BACKEND_DIR
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from captions.compression import compress_text, decompress_text  # noqa: E402
+
+TEXT_FIELDS = ('speakers', 'key_learnings', 'generated_caption')
+
+SCHEMA = """
+CREATE TABLE captions_captionrequest (
+    id char(32) NOT NULL PRIMARY KEY,
+    event_name varchar(500) NOT NULL,
+    event_type varchar(100) NOT NULL,
+    location varchar(200) NOT NULL,
+    speakers {text} NOT NULL,
+    key_learnings {text} NOT NULL,
+    length varchar(20) NOT NULL,
+    vibe integer NOT NULL,
+    language varchar(20) NOT NULL,
+    generated_caption {text} NOT NULL,
+    success bool NOT NULL,
+    error_message text NULL,
+    processing_time real NOT NULL,
+    created_at datetime NOT NULL,
+    ip_address char(39) NULL
+)
+"""
+
+# The analytics endpoint's queries (see views.analytics_summary)
+SCANS = {
+    'count_window': "SELECT COUNT(*) FROM captions_captionrequest WHERE created_at >= ?",
+    'avg_processing_time': (
+        "SELECT AVG(processing_time) FROM captions_captionrequest WHERE created_at >= ?"
+    ),
+    'popular_event_types': (
+        "SELECT event_type, COUNT(event_type) AS c FROM captions_captionrequest "
+        "WHERE created_at >= ? GROUP BY event_type ORDER BY c DESC LIMIT 5"
+    ),
+}
+
+HELD_OUT_CAPTIONS = [
+    "Two days, forty-odd sessions and far too much filter coffee later, I'm back from JSConf "
+    "Kerala with a head full of ideas. ☕\n\nThe talk that surprised me most was on shipping "
+    "fewer features. The speaker's team deleted a third of their settings page and support "
+    "tickets dropped by half. Less surface area, fewer ways to confuse people.\n\nAlso loved the "
+    "hallway debate on signals vs. stores. No winner, but everyone left with sharper opinions.\n\n"
+    "Who else was there? Tell me your favourite talk!\n\n#JavaScript #WebDev #Kerala #Frontend",
+    "Honoured to have presented our paper on low-resource Tamil speech recognition at the "
+    "National Research Symposium. 🎓\n\nA year ago our word error rate was embarrassing. Careful "
+    "data augmentation, a smarter tokeniser and a lot of patient annotation by our volunteers "
+    "brought it down by 38%.\n\nThank you to my guide, Dr. Kalaiselvi, and to every student who "
+    "spent their weekends labelling audio.\n\n#Research #NLP #Tamil #SpeechRecognition",
+    "We didn't win the hackathon. 😅\n\nBut in 36 hours our team of four built a working "
+    "prototype that routes ambulance requests to the nearest free vehicle, and two judges asked "
+    "us to keep building it.\n\nWhat I learned: scope ruthlessly, demo the happy path, and sleep "
+    "for at least three hours. Seriously.\n\nOnwards! #Hackathon #HealthTech #Teamwork",
+    "Closing the week with gratitude. 🙏\n\nOur startup hosted its first community meetup in "
+    "Coimbatore and over 120 people showed up on a rainy Saturday. Founders, students, a retired "
+    "textile engineer who asked the best question of the day.\n\nThe biggest signal for us: people "
+    "want honest conversations about failure, not polished success stories. We'll build the next "
+    "one around that.\n\nIf you want an invite, drop a comment. #Startups #Community #Coimbatore",
+]
+
+
+def _rows(count: int, seed: int):
+    start = datetime(2025, 1, 1)
+    for i, row in enumerate(caption_rows(count, seed=seed)):
+        row['id'] = uuid.UUID(int=i + 1).hex
+        row['created_at'] = (start + timedelta(minutes=30 * i)).isoformat(sep=' ')
+        yield row
+
+
+def build_database(path: str, rows, compressed: bool):
+    """Write the dataset to a fresh SQLite file"""
+    connection = sqlite3.connect(path)
+    connection.execute(SCHEMA.format(text='blob' if compressed else 'text'))
+    columns = [
+        'id', 'event_name', 'event_type', 'location', 'speakers', 'key_learnings', 'length', 'vibe',
+        'language', 'generated_caption', 'success', 'processing_time', 'created_at',
+    ]
+    insert = (
+        f"INSERT INTO captions_captionrequest ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' for _ in columns)})"
+    )
+    for row in rows:
+        values = [
+            compress_text(row[column]) if compressed and column in TEXT_FIELDS else row[column]
+            for column in columns
+        ]
+        connection.execute(insert, values)
+    connection.commit()
+    connection.execute("VACUUM")
+    connection.close()
+
+
+def time_scan(path: str, sql: str, since: str, repeat: int = 5) -> float:
+    """Best-of-`repeat` time for one query on a freshly opened connection"""
+    best = float('inf')
+    for _ in range(repeat):
+        connection = sqlite3.connect(path)
+        # No page cache carried between runs: every run reads the table pages
+        connection.execute("PRAGMA cache_size = 0")
+        start = time.perf_counter()
+        connection.execute(sql, (since,)).fetchall()
+        best = min(best, time.perf_counter() - start)
+        connection.close()
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    rows = list(_rows(args.rows, seed=2))
+    since = rows[len(rows) // 2]['created_at']
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {
+            'plain': os.path.join(directory, 'plain.sqlite3'),
+            'compressed': os.path.join(directory, 'compressed.sqlite3'),
+        }
+        for name, path in paths.items():
+            build_database(path, rows, compressed=(name == 'compressed'))
+
+        sizes = {name: os.path.getsize(path) for name, path in paths.items()}
+        print(f"Synthetic dataset: {args.rows} requests\n")
+        print(f"  {'database':<24}{'plain':>14}{'compressed':>14}{'saving':>10}")
+        print(f"  {'file size':<24}{sizes['plain'] / 1e6:>12.2f}MB{sizes['compressed'] / 1e6:>12.2f}MB"
+              f"{1 - sizes['compressed'] / sizes['plain']:>10.0%}")
+        for scan, sql in SCANS.items():
+            plain = time_scan(paths['plain'], sql, since)
+            compressed = time_scan(paths['compressed'], sql, since)
+            print(f"  {scan:<24}{plain * 1e3:>12.2f}ms{compressed * 1e3:>12.2f}ms"
+                  f"{1 - compressed / plain:>10.0%}")
+
+    print(f"\n  {'column bytes':<24}{'raw':>12}{'zlib':>12}{'dictionary':>12}{'ratio':>8}")
+    for field in TEXT_FIELDS:
+        values = [row[field] for row in rows]
+        _report_ratio(field, values)
+    _report_ratio('held-out captions', HELD_OUT_CAPTIONS)
+
+    captions = [compress_text(row['generated_caption']) for row in rows[:2000]]
+    start = time.perf_counter()
+    for value in captions:
+        decompress_text(value)
+    per_caption = (time.perf_counter() - start) / len(captions)
+    print(f"\nDecompression on access: {per_caption * 1e6:.1f}µs per caption")
+    return 0
+
+
+def _report_ratio(label: str, values):
+    raw = sum(len(value.encode('utf-8')) for value in values)
+    plain = sum(len(zlib.compress(value.encode('utf-8'), 9)) for value in values)
+    compressed = sum(len(compress_text(value)) for value in values)
+    print(f"  {label:<24}{raw:>12}{plain:>12}{compressed:>12}{raw / compressed:>7.1f}x")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
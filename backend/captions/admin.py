@@ -1,12 +1,12 @@
 from django.contrib import admin
-from .models import CaptionRequest, CaptionAnalytics
+from .models import CaptionRequest, CaptionAnalytics, CaptionLatencySketch
 
 
 @admin.register(CaptionRequest)
 class CaptionRequestAdmin(admin.ModelAdmin):
-    list_display = ['event_name', 'event_type', 'success', 'processing_time', 'created_at']
-    list_filter = ['success', 'event_type', 'language', 'length', 'created_at']
-    search_fields = ['event_name', 'location', 'speakers']
+    list_display = ['event_name', 'event_type', 'success', 'degraded', 'degraded_reason', 'processing_time', 'created_at']
+    list_filter = ['success', 'degraded', 'degraded_reason', 'event_type', 'language', 'length', 'created_at']
+    search_fields = ['event_name', 'location']
     readonly_fields = ['id', 'created_at', 'processing_time']
     list_per_page = 25
     
@@ -21,7 +21,7 @@ class CaptionRequestAdmin(admin.ModelAdmin):
             'fields': ('length', 'vibe', 'language')
         }),
         ('Request Details', {
-            'fields': ('success', 'error_message', 'processing_time', 'ip_address')
+            'fields': ('success', 'degraded', 'degraded_reason', 'error_message', 'processing_time', 'ip_address')
         }),
         ('Metadata', {
             'fields': ('id', 'created_at'),
@@ -32,6 +32,16 @@ class CaptionRequestAdmin(admin.ModelAdmin):
 
 @admin.register(CaptionAnalytics)
 class CaptionAnalyticsAdmin(admin.ModelAdmin):
-    list_display = ['date', 'total_requests', 'successful_requests', 'failed_requests', 'avg_processing_time']
+    list_display = [
+        'date', 'total_requests', 'successful_requests', 'degraded_requests', 'failed_requests',
+        'avg_processing_time'
+    ]
     list_filter = ['date']
     readonly_fields = ['date']
+
+
+@admin.register(CaptionLatencySketch)
+class CaptionLatencySketchAdmin(admin.ModelAdmin):
+    list_display = ['analytics', 'dimension', 'key', 'count']
+    list_filter = ['dimension', 'analytics__date']
+    readonly_fields = ['analytics', 'dimension', 'key', 'count', 'sketch']
@@ -0,0 +1,127 @@
+"""
+Dictionary compression for stored caption text.
+
+Captions, highlights and speaker lists are short, repetitive LinkedIn prose:
+on its own a single caption compresses poorly because deflate has no
+history to refer back to. Priming deflate with a preset dictionary of
+phrases that are common across captions (hooks, closings, hashtags, filler
+words) gives every value that history up front.
+
+Stored values are tagged with a one-byte header so the format can evolve:
+
+    0x00 + UTF-8 text       stored as-is (compression did not help)
+    0x01 + raw deflate      compressed with dictionary v1
+
+Dictionary v1 is the fixed prose of the caption templates (hooks, closings,
+section headers, hashtags; see train_caption_dictionary --from-templates).
+Dictionaries are frozen once shipped: a value written with dictionary N can
+only be read with the exact same bytes. To use a dictionary trained on real
+stored captions, add it as a new version and bump CURRENT_DICTIONARY; old
+rows stay readable.
+"""
+
+import os
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import Iterable
+
+TAG_PLAIN = 0
+DICTIONARY_FILES = {
+    1: 'captions_v1.dict',
+}
+CURRENT_DICTIONARY = 1
+
+# Deflate only looks back 32KB, so a larger dictionary is never used
+MAX_DICTIONARY_SIZE = 32 * 1024
+DEFAULT_DICTIONARY_SIZE = 16 * 1024
+COMPRESSION_LEVEL = 9
+
+DICTIONARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dictionaries')
+
+_TOKEN = re.compile(r'\S+\s*')
+
+
+class CompressedTextError(ValueError):
+    """Raised when a stored value cannot be decoded"""
+
+
+@lru_cache(maxsize=None)
+def get_dictionary(version: int) -> bytes:
+    """Load a shipped dictionary by version"""
+    try:
+        filename = DICTIONARY_FILES[version]
+    except KeyError:
+        raise CompressedTextError(f"Unknown compression dictionary version {version}") from None
+    with open(os.path.join(DICTIONARY_DIR, filename), 'rb') as f:
+        return f.read()
+
+
+def compress_text(text: str, version: int = CURRENT_DICTIONARY) -> bytes:
+    """Encode text for storage, compressed with the given dictionary when that is smaller"""
+    raw = text.encode('utf-8')
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -15, zdict=get_dictionary(version))
+    compressed = compressor.compress(raw) + compressor.flush()
+    if len(compressed) < len(raw):
+        return bytes((version,)) + compressed
+    return bytes((TAG_PLAIN,)) + raw
+
+
+def decompress_text(value: bytes) -> str:
+    """Decode a value produced by compress_text"""
+    value = bytes(value)
+    if not value:
+        raise CompressedTextError("Empty compressed value (missing header)")
+
+    tag, payload = value[0], value[1:]
+    if tag == TAG_PLAIN:
+        return payload.decode('utf-8')
+
+    decompressor = zlib.decompressobj(-15, zdict=get_dictionary(tag))
+    try:
+        raw = decompressor.decompress(payload) + decompressor.flush()
+    except zlib.error as e:
+        raise CompressedTextError(f"Corrupt compressed value: {e}") from e
+    return raw.decode('utf-8')
+
+
+def train_dictionary(samples: Iterable[str], size: int = DEFAULT_DICTIONARY_SIZE,
+                     max_phrase_words: int = 4, min_count: int = 3) -> bytes:
+    """
+    Build a preset dictionary from sample texts.
+
+    Counts phrases of 1..max_phrase_words words across the samples, scores
+    each by how many bytes it could save (occurrences x length) and keeps
+    the best ones that fit in `size` bytes. Deflate prefers nearby matches,
+    so the highest scoring phrases go at the end of the dictionary.
+    """
+    size = min(size, MAX_DICTIONARY_SIZE)
+    counts: Counter = Counter()
+    for sample in samples:
+        tokens = _TOKEN.findall(sample)
+        # Count each phrase once per sample so one long text cannot dominate
+        phrases = set()
+        for n in range(1, max_phrase_words + 1):
+            for i in range(len(tokens) - n + 1):
+                phrases.add(''.join(tokens[i:i + n]))
+        counts.update(phrases)
+
+    candidates = sorted(
+        ((count * len(phrase.encode('utf-8')), phrase) for phrase, count in counts.items()
+         if count >= min_count and len(phrase) > 3),
+        reverse=True
+    )
+
+    chosen, used = [], 0
+    for _, phrase in candidates:
+        encoded = phrase.encode('utf-8')
+        if used + len(encoded) > size:
+            continue
+        # Skip phrases already covered by a longer chosen phrase
+        if any(phrase in longer for longer in chosen if len(longer) > len(phrase)):
+            continue
+        chosen.append(phrase)
+        used += len(encoded)
+
+    return ''.join(reversed(chosen)).encode('utf-8')
@@ -0,0 +1,75 @@
+from django import forms
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+from .compression import compress_text, decompress_text
+
+
+class CompressedText(bytes):
+    """Stored (still compressed) value of a CompressedTextField; str() decodes it"""
+
+    def __str__(self):
+        return decompress_text(self)
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """Decompresses a loaded value on first access and caches the text"""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, CompressedText):
+            value = decompress_text(value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(models.Field):
+    """
+    Text field stored as a dictionary-compressed blob (see captions.compression).
+
+    Reads through model instances are unchanged: the value is a str, and is
+    only decompressed when the attribute is first accessed, so queries that
+    load rows without touching the field pay nothing. Rows saved again
+    without touching the field keep their stored bytes. values() and
+    values_list() return the stored CompressedText; use str() on it.
+
+    Rows written before the column was compressed (plain text) are read
+    as-is. The column cannot be searched or filtered by content.
+    """
+
+    descriptor_class = CompressedTextDescriptor
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or isinstance(value, str):
+            return value
+        return CompressedText(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, str):
+            return value
+        return decompress_text(value)
+
+    def pre_save(self, model_instance, add):
+        # Read the raw attribute so an untouched value is not decompressed
+        return model_instance.__dict__.get(self.attname)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return None
+        if not isinstance(value, CompressedText):
+            value = compress_text(str(value))
+        return connection.Database.Binary(value)
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
+
+    def formfield(self, **kwargs):
+        return super().formfield(**{'form_class': forms.CharField, 'widget': forms.Textarea, **kwargs})
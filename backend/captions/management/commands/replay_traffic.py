@@ -0,0 +1,421 @@
+import asyncio
+import json
+import os
+import platform
+import re
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from captions.models import CaptionRequest
+from captions.sketches import LatencySketch
+
+GENERATE_PATH = '/api/generate-caption/'
+
+# A step is saturated when it falls this far behind the offered load
+SATURATION_THROUGHPUT = 0.95
+SATURATION_ERROR_RATE = 0.01
+
+_EVENT_LINE = re.compile(r'- Event/Occasion: (.+)')
+
+
+class RecordedResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class RecordedLatencyModel:
+    """
+    Stand-in upstream model that replays recorded behaviour.
+
+    Each call sleeps for the recorded processing_time of the request being
+    replayed (matched by event name, scaled by `latency_scale`), then returns
+    the recorded caption, or raises if the original request failed. The
+    router awaits generate_content_async on its event loop, so replayed
+    calls, like real ones, do not hold a thread of the upstream executor.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], latency_scale: float = 1.0):
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._by_event: Dict[str, deque] = defaultdict(deque)
+        for row in rows:
+            self._by_event[row['payload']['eventName']].append(row)
+        self._fallback = rows
+
+    def _next_row(self, prompt) -> Dict[str, Any]:
+        match = _EVENT_LINE.search(prompt if isinstance(prompt, str) else '')
+        with self._lock:
+            recorded = self._by_event.get(match.group(1).strip()) if match else None
+            if recorded:
+                row = recorded.popleft()
+                recorded.append(row)
+            else:
+                row = self._fallback[hash(prompt if isinstance(prompt, str) else '') % len(self._fallback)]
+        return row
+
+    def _respond(self, row: Dict[str, Any]) -> RecordedResponse:
+        if not row['success']:
+            raise RuntimeError("Recorded upstream failure")
+        return RecordedResponse(row['caption'] or "Recorded caption placeholder. " * 3)
+
+    def generate_content(self, prompt, **kwargs):
+        row = self._next_row(prompt)
+        time.sleep(row['processing_time'] * self.latency_scale)
+        return self._respond(row)
+
+    async def generate_content_async(self, prompt, **kwargs):
+        row = self._next_row(prompt)
+        await asyncio.sleep(row['processing_time'] * self.latency_scale)
+        return self._respond(row)
+
+
+def _summary(values: List[float]) -> Dict[str, Any]:
+    sketch = LatencySketch()
+    for value in values:
+        sketch.add(max(value, 0.0))
+    return sketch.summary()
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay historical caption requests with their original spacing to measure "
+        "throughput, latency, errors and queueing as load increases"
+    )
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--target', help="Base URL of a running service, e.g. http://127.0.0.1:8000")
+        target.add_argument('--in-process', action='store_true',
+                            help="Replay through the views in this process against a throwaway "
+                                 "database, with the upstream stubbed by recorded processing times")
+        parser.add_argument('--limit', type=int, default=500, help="Number of historical requests to replay")
+        parser.add_argument('--since', help="Only replay requests created on or after this date (YYYY-MM-DD)")
+        parser.add_argument('--speedup', default='1,2,4',
+                            help="Comma-separated speed-up factors, one load step each")
+        parser.add_argument('--concurrency', type=int, default=32,
+                            help="Maximum requests in flight from the replay client")
+        parser.add_argument('--workers', default='',
+                            help="In-process only: comma-separated scheduler slot counts to try "
+                                 "(defaults to CAPTION_SCHEDULER['MAX_CONCURRENT'])")
+        parser.add_argument('--max-gap', type=float, default=60.0,
+                            help="Cap on the original gap between requests, in seconds, before speed-up")
+        parser.add_argument('--latency-scale', type=float, default=1.0,
+                            help="In-process only: multiply recorded processing times by this factor")
+        parser.add_argument('--duration', type=float, default=None,
+                            help="Stop sending new requests after this many seconds per step")
+        parser.add_argument('--priority', default=None, help="X-Caption-Priority header to send")
+        parser.add_argument('--timeout', type=float, default=120.0, help="HTTP request timeout in seconds")
+        parser.add_argument('--output', help="Write the JSON summary here")
+
+    def handle(self, *args, **options):
+        try:
+            speedups = [float(value) for value in options['speedup'].split(',') if value.strip()]
+            workers = [int(value) for value in options['workers'].split(',') if value.strip()]
+        except ValueError as e:
+            raise CommandError(f"Invalid --speedup/--workers: {e}")
+        if not speedups or any(value <= 0 for value in speedups):
+            raise CommandError("--speedup values must be positive")
+        if workers and not options['in_process']:
+            raise CommandError("--workers only applies to --in-process replays")
+
+        rows = self._load_history(options['limit'], options['since'])
+        if not rows:
+            raise CommandError("No caption requests to replay")
+        offsets = self._offsets(rows, options['max_gap'])
+        self.stdout.write(
+            f"Replaying {len(rows)} requests spanning {offsets[-1]:.1f}s "
+            f"(gaps capped at {options['max_gap']:.0f}s)"
+        )
+
+        steps = [(speedup, count) for count in (workers or [None]) for speedup in speedups]
+        if options['in_process']:
+            results = self._replay_in_process(rows, offsets, steps, options)
+        else:
+            results = [
+                self._run_step(rows, offsets, speedup, None, self._http_sender(options), options)
+                for speedup, _ in steps
+            ]
+
+        summary = self._build_summary(results, rows, options)
+        self._print_table(results)
+        if options['output']:
+            os.makedirs(os.path.dirname(os.path.abspath(options['output'])), exist_ok=True)
+            with open(options['output'], 'w') as fh:
+                json.dump(summary, fh, indent=2, sort_keys=True)
+            self.stdout.write(f"\nSummary written to {options['output']}")
+
+    def _load_history(self, limit: int, since: Optional[str]) -> List[Dict[str, Any]]:
+        """Read the requests to replay, oldest first"""
+        queryset = CaptionRequest.objects.order_by('-created_at')
+        if since:
+            queryset = queryset.filter(created_at__date__gte=since)
+
+        rows = []
+        for request in reversed(list(queryset[:limit])):
+            payload = {
+                'eventName': request.event_name,
+                'eventType': request.event_type,
+                'location': request.location,
+                'speakers': request.speakers,
+                'keyLearnings': request.key_learnings,
+                'length': request.length,
+                'vibe': request.vibe,
+                'language': request.language,
+            }
+            if request.degraded_reason == 'requested':
+                payload['mode'] = 'template'
+            rows.append({
+                'created_at': request.created_at,
+                'processing_time': request.processing_time,
+                # A template served in place of the model means the upstream call failed
+                'success': request.success and not request.degraded,
+                'caption': request.generated_caption,
+                'payload': payload,
+            })
+        return rows
+
+    def _offsets(self, rows: List[Dict[str, Any]], max_gap: float) -> List[float]:
+        """Send time of each request relative to the first, before speed-up"""
+        offsets = [0.0]
+        for previous, current in zip(rows, rows[1:]):
+            gap = (current['created_at'] - previous['created_at']).total_seconds()
+            offsets.append(offsets[-1] + min(max(gap, 0.0), max_gap))
+        return offsets
+
+    def _http_sender(self, options):
+        url = options['target'].rstrip('/') + GENERATE_PATH
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if options['priority']:
+            headers['X-Caption-Priority'] = options['priority']
+
+        def send(payload):
+            request = urllib.request.Request(url, json.dumps(payload).encode('utf-8'), headers, method='POST')
+            try:
+                with urllib.request.urlopen(request, timeout=options['timeout']) as response:
+                    return response.status, response.read()
+            except urllib.error.HTTPError as e:
+                return e.code, e.read()
+            except (urllib.error.URLError, OSError) as e:
+                return None, str(e).encode('utf-8')
+
+        return send
+
+    def _replay_in_process(self, rows, offsets, steps, options):
+        """Run the steps through the views with a stubbed upstream and a throwaway database"""
+        from django.test import Client
+        from django.test.utils import setup_databases, setup_test_environment, teardown_databases
+        from captions import views
+        from captions.services.latency_analytics import latency_recorder
+        from captions.services.model_router import ModelStats
+        from captions.services.scheduler import CaptionScheduler
+
+        if views.caption_generator is None:
+            raise CommandError("Caption generator failed to initialise (is GEMINI_API_KEY set?)")
+
+        # Concurrent writers need a file-backed SQLite test database
+        database = settings.DATABASES['default']
+        test_settings = database.setdefault('TEST', {})
+        test_name = test_settings.get('NAME')
+        directory = tempfile.TemporaryDirectory()
+        if database['ENGINE'].endswith('sqlite3'):
+            test_settings['NAME'] = os.path.join(directory.name, 'replay.sqlite3')
+
+        # Samples buffered so far belong to the real database
+        latency_recorder.flush()
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        scheduler = views.caption_scheduler
+        handles = views.caption_generator.router.handles
+        models = [handle.model for handle in handles]
+        try:
+            stub = RecordedLatencyModel(rows, options['latency_scale'])
+            local = threading.local()
+
+            def send(payload):
+                client = getattr(local, 'client', None)
+                if client is None:
+                    client = local.client = Client()
+                extra = {'HTTP_X_CAPTION_PRIORITY': options['priority']} if options['priority'] else {}
+                response = client.post(GENERATE_PATH, json.dumps(payload), content_type='application/json', **extra)
+                return response.status_code, response.content
+
+            results = []
+            for speedup, workers in steps:
+                # Fresh scheduler and router history so steps do not influence each other
+                views.caption_scheduler = CaptionScheduler(
+                    max_concurrent=workers or settings.CAPTION_SCHEDULER['MAX_CONCURRENT'],
+                    max_queue_wait=settings.CAPTION_SCHEDULER['MAX_QUEUE_WAIT'],
+                    aging_rate=settings.CAPTION_SCHEDULER['AGING_RATE'],
+                    batch_penalty=settings.CAPTION_SCHEDULER['BATCH_PENALTY'],
+                    fairness_weight=settings.CAPTION_SCHEDULER['FAIRNESS_WEIGHT'],
+                )
+                for handle in handles:
+                    handle.model = stub
+                    handle.stats = ModelStats(handle.stats.window, handle.stats.sample_ttl)
+                results.append(self._run_step(
+                    rows, offsets, speedup, views.caption_scheduler.max_concurrent, send, options
+                ))
+            return results
+        finally:
+            views.caption_scheduler = scheduler
+            for handle, model in zip(handles, models):
+                handle.model = model
+            # Write the replayed samples to the throwaway database while it is
+            # still the default one; buffered past teardown, the flush thread or
+            # the exit hook would add them to the real analytics
+            latency_recorder.stop()
+            teardown_databases(old_config, verbosity=0)
+            test_settings['NAME'] = test_name
+            directory.cleanup()
+
+    def _run_step(self, rows, offsets, speedup, workers, send, options) -> Dict[str, Any]:
+        """Send every request at its scheduled time (open loop) and collect outcomes"""
+        label = f"speedup={speedup:g}" + (f", workers={workers}" if workers else '')
+        self.stdout.write(f"▶ {label}", ending='\n')
+        self.stdout.flush()
+
+        outcomes = []
+        outcomes_lock = threading.Lock()
+
+        def replay(payload, scheduled_at):
+            sent_at = time.monotonic()
+            status, body = send(payload)
+            finished_at = time.monotonic()
+            try:
+                data = json.loads(body) if body else {}
+            except ValueError:
+                data = {}
+            # A template served because the upstream failed is not a success
+            degraded = bool(data.get('degraded')) and data.get('degraded_reason') != 'requested'
+            with outcomes_lock:
+                outcomes.append({
+                    'status': status,
+                    'ok': status == 200 and bool(data.get('success')) and not degraded,
+                    'degraded': degraded,
+                    'lag': sent_at - scheduled_at,
+                    'latency': finished_at - sent_at,
+                    'queue_time': data.get('queue_time'),
+                    'finished_at': finished_at,
+                })
+
+        start = time.monotonic()
+        sent = 0
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            for row, offset in zip(rows, offsets):
+                due = offset / speedup
+                if options['duration'] is not None and due > options['duration']:
+                    break
+                delay = start + due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(replay, row['payload'], start + due)
+                sent += 1
+            offered_span = offsets[sent - 1] / speedup if sent else 0.0
+
+        elapsed = max((o['finished_at'] for o in outcomes), default=start) - start
+        # Completions spread over the same span as sends unless the service falls behind
+        finished = sorted(o['finished_at'] for o in outcomes)
+        completion_span = finished[-1] - finished[0] if len(finished) > 1 else 0.0
+        ok = sum(1 for o in outcomes if o['ok'])
+        degraded = sum(1 for o in outcomes if o['degraded'])
+        errors = len(outcomes) - ok - degraded
+        offered_rps = sent / offered_span if offered_span > 0 else None
+        throughput_rps = ok / completion_span if completion_span > 0 else None
+        error_rate = errors / len(outcomes) if outcomes else 0.0
+        degraded_rate = degraded / len(outcomes) if outcomes else 0.0
+        # Requests that failed when recorded are expected to fail (or degrade) again
+        recorded_failure_rate = (
+            sum(1 for row in rows[:sent] if not row['success']) / sent if sent else 0.0
+        )
+
+        return {
+            'label': label,
+            'speedup': speedup,
+            'workers': workers,
+            'requests': sent,
+            'completed': len(outcomes),
+            'ok': ok,
+            'errors': errors,
+            'error_rate': error_rate,
+            'degraded_rate': degraded_rate,
+            'recorded_failure_rate': recorded_failure_rate,
+            'status_counts': {str(k): v for k, v in sorted(Counter(o['status'] for o in outcomes).items(),
+                                                             key=lambda item: str(item[0]))},
+            'elapsed': elapsed,
+            'offered_rps': offered_rps,
+            'throughput_rps': throughput_rps,
+            'saturated': bool(
+                error_rate + degraded_rate > recorded_failure_rate + SATURATION_ERROR_RATE
+                or (offered_rps and throughput_rps is not None
+                    and throughput_rps < offered_rps * (1 - recorded_failure_rate) * SATURATION_THROUGHPUT)
+            ),
+            'latency': _summary([o['latency'] for o in outcomes]),
+            'queue_time': _summary([o['queue_time'] for o in outcomes if o['queue_time'] is not None]),
+            'client_lag': _summary([o['lag'] for o in outcomes]),
+        }
+
+    def _build_summary(self, results, rows, options) -> Dict[str, Any]:
+        """JSON summary; 'results' is readable by `python -m benchmarks compare`"""
+        return {
+            'environment': {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'django': django.get_version(),
+            },
+            'config': {
+                'mode': 'in-process' if options['in_process'] else options['target'],
+                'requests': len(rows),
+                'first_request': rows[0]['created_at'].isoformat(),
+                'last_request': rows[-1]['created_at'].isoformat(),
+                'concurrency': options['concurrency'],
+                'max_gap': options['max_gap'],
+                'latency_scale': options['latency_scale'] if options['in_process'] else None,
+                'duration': options['duration'],
+            },
+            'steps': results,
+            'results': {
+                f"replay_traffic[{step['label'].replace(' ', '')}]": {
+                    'median': step['latency']['p50'],
+                    'p90': step['latency']['p90'],
+                    'p99': step['latency']['p99'],
+                    'throughput_rps': step['throughput_rps'],
+                    'error_rate': step['error_rate'],
+                    'degraded_rate': step['degraded_rate'],
+                }
+                for step in results if step['latency']['p50'] is not None
+            },
+        }
+
+    def _print_table(self, results):
+        def ms(value):
+            return f"{value * 1e3:.0f}ms" if value is not None else '-'
+
+        def rate(value):
+            return f"{value:.2f}" if value is not None else '-'
+
+        self.stdout.write(
+            f"\n{'step':<26}{'offered/s':>10}{'ok/s':>8}{'errors':>8}{'degraded':>9}"
+            f"{'p50':>9}{'p90':>9}{'p99':>9}{'queue p90':>11}{'lag p90':>9}"
+        )
+        for step in results:
+            line = (
+                f"{step['label']:<26}{rate(step['offered_rps']):>10}{rate(step['throughput_rps']):>8}"
+                f"{step['error_rate']:>8.1%}{step['degraded_rate']:>9.1%}"
+                f"{ms(step['latency']['p50']):>9}{ms(step['latency']['p90']):>9}{ms(step['latency']['p99']):>9}"
+                f"{ms(step['queue_time']['p90']):>11}{ms(step['client_lag']['p90']):>9}"
+            )
+            if step['saturated']:
+                line = self.style.WARNING(f"{line}  ⚠ saturated")
+            self.stdout.write(line)
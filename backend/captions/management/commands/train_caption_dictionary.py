@@ -0,0 +1,106 @@
+import os
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+
+from captions.compression import (
+    CURRENT_DICTIONARY, DEFAULT_DICTIONARY_SIZE, DICTIONARY_DIR, DICTIONARY_FILES, MAX_DICTIONARY_SIZE,
+    compress_text, train_dictionary,
+)
+from captions.models import CaptionRequest
+from captions.services import template_composer
+from captions.services.caption_generator import CLOSINGS, HOOKS
+
+TEXT_FIELDS = ('generated_caption', 'key_learnings', 'speakers')
+
+_PLACEHOLDER = re.compile(r'\{\w+\}')
+
+
+def template_phrases():
+    """The fixed prose of the caption templates, with the request placeholders removed"""
+    phrases = []
+    for table in (HOOKS, CLOSINGS):
+        phrases.extend(phrase for vibe in table.values() for phrase in vibe)
+    for table in (template_composer.CONTEXT_TEMPLATES, template_composer.INSIGHT_HEADERS,
+                  template_composer.TANGLISH_FLAVOR):
+        phrases.extend(table.values())
+    phrases.extend(' '.join(tags) for tags in template_composer.FIELD_HASHTAGS.values())
+    phrases.append('#LinkedIn #Learning #Networking')
+    return [_PLACEHOLDER.sub('', phrase) for phrase in phrases]
+
+
+class Command(BaseCommand):
+    help = "Train a new compression dictionary from stored caption requests"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', type=int, default=5000,
+                            help="Number of most recent requests to train on")
+        parser.add_argument('--size', type=int, default=DEFAULT_DICTIONARY_SIZE,
+                            help=f"Dictionary size in bytes (at most {MAX_DICTIONARY_SIZE})")
+        parser.add_argument('--from-templates', action='store_true',
+                            help="Rebuild the seed dictionary v1 from the caption templates instead "
+                                 "of training on stored requests. Without --output this writes "
+                                 "captions_v1.dict, or checks it is unchanged when it exists")
+        parser.add_argument('--output', help="Output file (defaults to the next dictionary version, "
+                                             "or to v1 with --from-templates)")
+
+    def handle(self, *args, **options):
+        if options['from_templates']:
+            self._build_from_templates(options)
+            return
+
+        version = CURRENT_DICTIONARY + 1
+        output = options['output'] or os.path.join(DICTIONARY_DIR, f'captions_v{version}.dict')
+        if os.path.exists(output):
+            raise CommandError(f"{output} already exists; shipped dictionaries must never change")
+
+        # Model captions only: template captions are already covered by the templates
+        rows = list(
+            CaptionRequest.objects.filter(success=True, degraded=False)
+            .only(*TEXT_FIELDS)[:options['samples']]
+        )
+        if not rows:
+            raise CommandError("No caption requests to train on")
+
+        samples = [str(getattr(row, field)) for row in rows for field in TEXT_FIELDS]
+        dictionary = train_dictionary(samples, options['size'])
+        with open(output, 'wb') as f:
+            f.write(dictionary)
+
+        raw = sum(len(sample.encode('utf-8')) for sample in samples)
+        current = sum(len(compress_text(sample)) for sample in samples)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(dictionary)} byte dictionary trained on {len(rows)} requests to {output}"
+        ))
+        self.stdout.write(
+            f"Training set: {raw} bytes raw, {current} bytes with dictionary v{CURRENT_DICTIONARY}"
+        )
+        self.stdout.write(
+            f"To use it, add {version}: '{os.path.basename(output)}' to DICTIONARY_FILES in "
+            f"captions/compression.py and set CURRENT_DICTIONARY = {version}"
+        )
+
+    def _build_from_templates(self, options):
+        # Each phrase occurs once, so there is nothing to rank: use them all
+        dictionary = '\n\n'.join(template_phrases()).encode('utf-8')[-options['size']:]
+        shipped = os.path.join(DICTIONARY_DIR, DICTIONARY_FILES[1])
+        output = options['output'] or shipped
+
+        if os.path.exists(output):
+            if output != shipped:
+                raise CommandError(f"{output} already exists; shipped dictionaries must never change")
+            with open(output, 'rb') as f:
+                existing = f.read()
+            if existing != dictionary:
+                raise CommandError(
+                    f"The caption templates no longer produce {output}, which must never change; "
+                    f"pass --output to write them as a new dictionary version"
+                )
+            self.stdout.write(self.style.SUCCESS(f"{output} matches the caption templates"))
+            return
+
+        with open(output, 'wb') as f:
+            f.write(dictionary)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(dictionary)} byte dictionary from the caption templates to {output}"
+        ))
@@ -0,0 +1,148 @@
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """Parse an Accept-Encoding header into {coding: qvalue}"""
+    codings = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        qvalue = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                qvalue = float(params[2:])
+            except ValueError:
+                qvalue = 0.0
+        codings[coding] = qvalue
+    return codings
+
+
+def _brotli_stream(chunks, quality):
+    """Compress an iterable of chunks without buffering the whole body"""
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Negotiated brotli/gzip response compression.
+
+    Picks brotli when the client accepts it and the `brotli` package is
+    installed, otherwise gzip. Regular responses are only compressed above
+    RESPONSE_COMPRESSION['MIN_SIZE'] bytes and only if that makes them
+    smaller. Streaming responses are compressed chunk by chunk and flushed
+    after every chunk, so they are never buffered.
+
+    Only JSON responses under RESPONSE_COMPRESSION['PATH_PREFIX'] that set
+    no cookies are compressed. Compressing a page that reflects request
+    input next to a secret (CSRF token, session cookie) lets an attacker
+    recover the secret from response sizes (BREACH), so HTML such as the
+    admin is always sent as-is.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        config = getattr(settings, 'RESPONSE_COMPRESSION', {})
+        self.min_size = config.get('MIN_SIZE', 1024)
+        self.path_prefix = config.get('PATH_PREFIX', '/api/')
+        self.brotli_quality = config.get('BROTLI_QUALITY', 4)
+        self.gzip_max_random_bytes = config.get('GZIP_MAX_RANDOM_BYTES', 100)
+
+    def select_encoding(self, request):
+        """Return 'br', 'gzip' or None for this request"""
+        accepted = parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        wildcard = accepted.get('*', 0.0)
+        br_q = accepted.get('br', wildcard) if brotli is not None else 0.0
+        gzip_q = accepted.get('gzip', wildcard)
+        if br_q > 0 and br_q >= gzip_q:
+            return 'br'
+        if gzip_q > 0:
+            return 'gzip'
+        return None
+
+    def is_compressible(self, request, response) -> bool:
+        """Only API JSON without cookies (see the class docstring)"""
+        content_type = response.get('Content-Type', '').partition(';')[0].strip().lower()
+        return (
+            request.path.startswith(self.path_prefix)
+            and content_type == 'application/json'
+            and not response.cookies
+        )
+
+    def process_response(self, request, response):
+        if not self.is_compressible(request, response):
+            return response
+
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = self.select_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self._compress_stream(response, encoding)
+            # The compressed size is unknown until the stream is consumed
+            del response.headers['Content-Length']
+        else:
+            compressed = self._compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # A strong ETag no longer matches the encoded representation
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+
+        return response
+
+    def _compress(self, content, encoding):
+        if encoding == 'br':
+            return brotli.compress(content, quality=self.brotli_quality)
+        return compress_string(content, max_random_bytes=self.gzip_max_random_bytes)
+
+    def _compress_stream(self, response, encoding):
+        # Capture the current iterator in case streaming_content is reassigned
+        original = response.streaming_content
+
+        if response.is_async:
+            async def async_wrapper():
+                if encoding == 'br':
+                    compressor = brotli.Compressor(quality=self.brotli_quality)
+                    async for chunk in original:
+                        data = compressor.process(chunk) + compressor.flush()
+                        if data:
+                            yield data
+                    yield compressor.finish()
+                else:
+                    async for chunk in original:
+                        yield compress_string(chunk, max_random_bytes=self.gzip_max_random_bytes)
+
+            return async_wrapper()
+
+        if encoding == 'br':
+            return _brotli_stream(original, self.brotli_quality)
+        return compress_sequence(original, max_random_bytes=self.gzip_max_random_bytes)
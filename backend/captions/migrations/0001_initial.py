@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:11
+
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaptionAnalytics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('total_requests', models.IntegerField(default=0)),
+                ('successful_requests', models.IntegerField(default=0)),
+                ('failed_requests', models.IntegerField(default=0)),
+                ('avg_processing_time', models.FloatField(default=0.0)),
+                ('most_popular_event_type', models.CharField(blank=True, max_length=100)),
+                ('most_popular_vibe_range', models.CharField(blank=True, max_length=50)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CaptionRequest',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('event_name', models.CharField(max_length=500)),
+                ('event_type', models.CharField(max_length=100)),
+                ('location', models.CharField(max_length=200)),
+                ('speakers', models.TextField()),
+                ('key_learnings', models.TextField()),
+                ('length', models.CharField(choices=[('short', 'Short'), ('medium', 'Medium'), ('long', 'Long')], max_length=20)),
+                ('vibe', models.IntegerField(help_text='Vibe score from 0-100')),
+                ('language', models.CharField(choices=[('english', 'English'), ('tanglish', 'Tanglish')], max_length=20)),
+                ('generated_caption', models.TextField()),
+                ('success', models.BooleanField(default=True)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('processing_time', models.FloatField(help_text='Time taken to generate caption in seconds')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
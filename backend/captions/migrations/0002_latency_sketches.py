@@ -0,0 +1,77 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def _vibe_category(vibe):
+    if vibe <= 33:
+        return 'professional'
+    elif vibe <= 66:
+        return 'casual'
+    return 'genz'
+
+
+def backfill_latency_sketches(apps, schema_editor):
+    """Build daily analytics and latency sketches from existing requests"""
+    # Self-contained (bar the sketch type) so later changes to the live
+    # analytics code cannot change what this migration does
+    from captions.sketches import LatencySketch
+
+    CaptionRequest = apps.get_model('captions', 'CaptionRequest')
+    CaptionAnalytics = apps.get_model('captions', 'CaptionAnalytics')
+    CaptionLatencySketch = apps.get_model('captions', 'CaptionLatencySketch')
+
+    days = {}
+    rows = CaptionRequest.objects.values_list('created_at', 'processing_time', 'vibe', 'length', 'success')
+    for created_at, processing_time, vibe, length, success in rows.iterator():
+        day = days.setdefault(created_at.date(), {'total': 0, 'successful': 0, 'time': 0.0, 'sketches': {}})
+        processing_time = max(processing_time, 0.0)
+        day['total'] += 1
+        day['successful'] += 1 if success else 0
+        day['time'] += processing_time
+        for dimension in (('all', 'all'), ('vibe', _vibe_category(vibe)), ('length', length)):
+            day['sketches'].setdefault(dimension, LatencySketch()).add(processing_time)
+
+    for date, day in days.items():
+        analytics, _ = CaptionAnalytics.objects.get_or_create(date=date)
+        previous = analytics.total_requests
+        analytics.total_requests = previous + day['total']
+        analytics.successful_requests += day['successful']
+        analytics.failed_requests += day['total'] - day['successful']
+        analytics.avg_processing_time = (
+            analytics.avg_processing_time * previous + day['time']
+        ) / analytics.total_requests
+        analytics.save()
+        CaptionLatencySketch.objects.bulk_create([
+            CaptionLatencySketch(
+                analytics=analytics, dimension=dimension, key=key, count=sketch.count, sketch=sketch.to_dict()
+            )
+            for (dimension, key), sketch in day['sketches'].items()
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('captions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaptionLatencySketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('all', 'All requests'), ('vibe', 'Vibe category'), ('length', 'Length')], max_length=20)),
+                ('key', models.CharField(help_text="Vibe category or length; 'all' for the overall sketch", max_length=50)),
+                ('count', models.IntegerField(default=0)),
+                ('sketch', models.JSONField(default=dict)),
+                ('analytics', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='latency_sketches', to='captions.captionanalytics')),
+            ],
+            options={
+                'ordering': ['-analytics__date', 'dimension', 'key'],
+                'unique_together': {('analytics', 'dimension', 'key')},
+            },
+        ),
+        migrations.RunPython(backfill_latency_sketches, migrations.RunPython.noop),
+    ]
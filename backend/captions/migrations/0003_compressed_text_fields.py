@@ -0,0 +1,86 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:30
+
+import captions.fields
+from django.db import migrations
+
+COMPRESSED_FIELDS = ['speakers', 'key_learnings', 'generated_caption']
+BATCH_SIZE = 500
+
+
+def require_sqlite_for_existing_rows(apps, schema_editor):
+    """
+    Refuse to convert stored rows on databases other than SQLite.
+
+    SQLite keeps the old text values when the columns become binary, so
+    compress_existing_rows can tell them apart and rewrite them. Other
+    backends convert (or reject) the values during the ALTER, leaving
+    bytes that are not in the compressed format. Empty tables are fine.
+    """
+    if schema_editor.connection.vendor == 'sqlite':
+        return
+    CaptionRequest = apps.get_model('captions', 'CaptionRequest')
+    if CaptionRequest.objects.exists():
+        raise RuntimeError(
+            f"Migration captions.0003 can only convert existing caption requests on SQLite, "
+            f"not {schema_editor.connection.vendor}; export and re-import them instead"
+        )
+
+
+def compress_existing_rows(apps, schema_editor):
+    """Rewrite plain-text values in compressed form"""
+    CaptionRequest = apps.get_model('captions', 'CaptionRequest')
+
+    batch = []
+    for row in CaptionRequest.objects.only('id', *COMPRESSED_FIELDS).iterator(chunk_size=BATCH_SIZE):
+        # Legacy values load as str; they are compressed when written back
+        if any(isinstance(row.__dict__[name], str) for name in COMPRESSED_FIELDS):
+            batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            CaptionRequest.objects.bulk_update(batch, COMPRESSED_FIELDS)
+            batch = []
+    if batch:
+        CaptionRequest.objects.bulk_update(batch, COMPRESSED_FIELDS)
+
+
+def decompress_existing_rows(apps, schema_editor):
+    """Write values back as plain text before the columns revert to TextField"""
+    from captions.compression import decompress_text
+
+    CaptionRequest = apps.get_model('captions', 'CaptionRequest')
+    table = schema_editor.quote_name(CaptionRequest._meta.db_table)
+    columns = ', '.join(schema_editor.quote_name(name) for name in COMPRESSED_FIELDS)
+    assignments = ', '.join(f"{schema_editor.quote_name(name)} = %s" for name in COMPRESSED_FIELDS)
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT id, {columns} FROM {table}")
+        rows = cursor.fetchall()
+        for row_id, *values in rows:
+            texts = [value if isinstance(value, str) else decompress_text(value) for value in values]
+            cursor.execute(f"UPDATE {table} SET {assignments} WHERE id = %s", [*texts, row_id])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('captions', '0002_latency_sketches'),
+    ]
+
+    operations = [
+        migrations.RunPython(require_sqlite_for_existing_rows, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='captionrequest',
+            name='generated_caption',
+            field=captions.fields.CompressedTextField(),
+        ),
+        migrations.AlterField(
+            model_name='captionrequest',
+            name='key_learnings',
+            field=captions.fields.CompressedTextField(),
+        ),
+        migrations.AlterField(
+            model_name='captionrequest',
+            name='speakers',
+            field=captions.fields.CompressedTextField(),
+        ),
+        migrations.RunPython(compress_existing_rows, decompress_existing_rows),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('captions', '0003_compressed_text_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='captionanalytics',
+            name='degraded_requests',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='captionrequest',
+            name='degraded',
+            field=models.BooleanField(default=False, help_text='A template caption was served instead of a model one'),
+        ),
+        migrations.AddField(
+            model_name='captionrequest',
+            name='degraded_reason',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='captionlatencysketch',
+            name='dimension',
+            field=models.CharField(choices=[('all', 'All requests'), ('vibe', 'Vibe category'), ('length', 'Length'), ('outcome', 'Outcome')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='captionlatencysketch',
+            name='key',
+            field=models.CharField(help_text="Vibe category, length or outcome (ok/degraded/failed); 'all' for the overall sketch", max_length=50),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.utils import timezone
 import uuid
 
+from .fields import CompressedTextField
+
 
 class CaptionRequest(models.Model):
     """Model to track caption generation requests for analytics"""
@@ -10,8 +12,8 @@ class CaptionRequest(models.Model):
     event_name = models.CharField(max_length=500)
     event_type = models.CharField(max_length=100)
     location = models.CharField(max_length=200)
-    speakers = models.TextField()
-    key_learnings = models.TextField()
+    speakers = CompressedTextField()
+    key_learnings = CompressedTextField()
     length = models.CharField(max_length=20, choices=[
         ('short', 'Short'),
         ('medium', 'Medium'),
@@ -22,8 +24,10 @@ class CaptionRequest(models.Model):
         ('english', 'English'),
         ('tanglish', 'Tanglish')
     ])
-    generated_caption = models.TextField()
+    generated_caption = CompressedTextField()
     success = models.BooleanField(default=True)
+    degraded = models.BooleanField(default=False, help_text="A template caption was served instead of a model one")
+    degraded_reason = models.CharField(max_length=50, blank=True)
     error_message = models.TextField(blank=True, null=True)
     processing_time = models.FloatField(help_text="Time taken to generate caption in seconds")
     created_at = models.DateTimeField(default=timezone.now)
@@ -43,6 +47,7 @@ class CaptionAnalytics(models.Model):
     total_requests = models.IntegerField(default=0)
     successful_requests = models.IntegerField(default=0)
     failed_requests = models.IntegerField(default=0)
+    degraded_requests = models.IntegerField(default=0)
     avg_processing_time = models.FloatField(default=0.0)
     most_popular_event_type = models.CharField(max_length=100, blank=True)
     most_popular_vibe_range = models.CharField(max_length=50, blank=True)
@@ -52,3 +57,33 @@ class CaptionAnalytics(models.Model):
         
     def __str__(self):
         return f"Analytics for {self.date}"
+
+
+class CaptionLatencySketch(models.Model):
+    """Mergeable processing-time sketch (see captions.sketches) for one day and dimension"""
+    
+    DIMENSION_ALL = 'all'
+    DIMENSION_VIBE = 'vibe'
+    DIMENSION_LENGTH = 'length'
+    DIMENSION_OUTCOME = 'outcome'
+    
+    analytics = models.ForeignKey(CaptionAnalytics, on_delete=models.CASCADE, related_name='latency_sketches')
+    dimension = models.CharField(max_length=20, choices=[
+        (DIMENSION_ALL, 'All requests'),
+        (DIMENSION_VIBE, 'Vibe category'),
+        (DIMENSION_LENGTH, 'Length'),
+        (DIMENSION_OUTCOME, 'Outcome')
+    ])
+    key = models.CharField(
+        max_length=50,
+        help_text="Vibe category, length or outcome (ok/degraded/failed); 'all' for the overall sketch"
+    )
+    count = models.IntegerField(default=0)
+    sketch = models.JSONField(default=dict)
+    
+    class Meta:
+        ordering = ['-analytics__date', 'dimension', 'key']
+        unique_together = ['analytics', 'dimension', 'key']
+        
+    def __str__(self):
+        return f"{self.dimension}={self.key} latency sketch for {self.analytics.date}"
@@ -0,0 +1,50 @@
+import codecs
+import io
+import re
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import FastJSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# orjson turns integers wider than 64 bits into floats; any run of 19+
+# digits could be one, so such payloads go to the stock parser
+_WIDE_INTEGER = re.compile(rb'\d{19}')
+
+
+class FastJSONParser(JSONParser):
+    """
+    Drop-in replacement for DRF's JSONParser backed by orjson.
+
+    orjson rejects NaN/Infinity just like the stock parser in strict mode.
+    Anything orjson refuses or would decode differently (integers wider
+    than 64 bits) is parsed by the stock parser instead, so accepted input,
+    results and error messages are unchanged.
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse the incoming bytestream as JSON and return the resulting data"""
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        if orjson is None or not self.strict or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        raw = stream.read()
+        if _WIDE_INTEGER.search(raw):
+            return self._parse_stock(raw, media_type, parser_context)
+
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            return self._parse_stock(raw, media_type, parser_context)
+
+    def _parse_stock(self, raw, media_type, parser_context):
+        return super().parse(io.BytesIO(raw), media_type, parser_context)
@@ -0,0 +1,90 @@
+import decimal
+import math
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+# Datetimes and dataclasses are passed through to DRF's encoder so they are
+# formatted exactly as the stock renderer formats them
+_ORJSON_BASE_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+    | orjson.OPT_NON_STR_KEYS
+    if orjson else 0
+)
+
+_LINE_SEPARATOR = '\u2028'.encode()
+_PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+def _has_non_finite(value) -> bool:
+    """True if `value` contains NaN or +/-Infinity (which orjson writes as null)"""
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, decimal.Decimal):
+        return not value.is_finite()
+    if isinstance(value, dict):
+        return any(_has_non_finite(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_non_finite(item) for item in value)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement for DRF's JSONRenderer backed by orjson.
+
+    Produces JSON that decodes to the same values as the stock renderer's,
+    though not always the same bytes (floats are spelled differently, e.g.
+    0.000042 for 4.2e-05 and 1e16 for 1e+16). Datetimes, dates and times are
+    handed back to DRF's JSONEncoder (so UTC datetimes still end in 'Z'),
+    UUIDs, lazy strings and decimals go through the same encoder, and
+    U+2028/U+2029 are escaped. Anything orjson cannot reproduce (custom
+    indents, ASCII-only output, oversized integers, NaN/Infinity, which
+    the stock renderer rejects) falls back to the stock implementation.
+    Without orjson installed this class is the stock renderer.
+    """
+
+    _encoder = JSONEncoder()
+
+    def _can_use_orjson(self, indent) -> bool:
+        return (
+            orjson is not None
+            and not self.ensure_ascii
+            and self.compact
+            and indent in (None, 2)
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into JSON, returning a bytestring"""
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if not self._can_use_orjson(indent):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        option = _ORJSON_BASE_OPTIONS
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+
+        try:
+            ret = orjson.dumps(data, default=self._encoder.default, option=option)
+        except (orjson.JSONEncodeError, ValueError):
+            # Let the stock renderer produce its own output or error
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # orjson writes non-finite floats as null; the stock renderer raises
+        if b'null' in ret and _has_non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if _LINE_SEPARATOR in ret or _PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(_LINE_SEPARATOR, b'\\u2028').replace(_PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
@@ -0,0 +1,249 @@
+"""
+Lightweight request schema for caption generation.
+
+`validate_caption_request` is a single-pass replacement for
+`CaptionRequestSerializer(data=...).is_valid()` on the hot path. It accepts
+and rejects exactly the same input and produces the same error payload
+(same keys, messages and ordering), but skips DRF's per-field machinery and
+returns one immutable `CaptionInput` that is passed unchanged through the
+scheduler, the generator and persistence.
+
+Keep the field specs below in sync with `CaptionRequestSerializer`.
+"""
+
+import re
+from collections.abc import Mapping
+from typing import Dict, Any, List, Optional, Tuple
+
+NON_FIELD_ERRORS_KEY = 'non_field_errors'
+
+_MISSING = object()
+
+# Same rule DRF's IntegerField uses: '1.0' is an int, '1.2' is not
+_RE_DECIMAL = re.compile(r'\.0*\s*$')
+_MAX_INT_STRING_LENGTH = 1000
+
+# re's Unicode "word" class is str.isalnum() plus '_'
+_ALNUM = re.compile(r'[^\W_]')
+_THREE_WORDS = re.compile(r'\S+\s+\S+\s+\S')
+_SURROGATE = re.compile('[\ud800-\udfff]')
+
+REQUIRED = 'This field is required.'
+NULL = 'This field may not be null.'
+BLANK = 'This field may not be blank.'
+INVALID_STRING = 'Not a valid string.'
+INVALID_INTEGER = 'A valid integer is required.'
+INVALID_CHOICE = '"{input}" is not a valid choice.'
+MAX_LENGTH = 'Ensure this field has no more than {max_length} characters.'
+MIN_LENGTH = 'Ensure this field has at least {min_length} characters.'
+MAX_VALUE = 'Ensure this value is less than or equal to {max_value}.'
+MIN_VALUE = 'Ensure this value is greater than or equal to {min_value}.'
+STRING_TOO_LARGE = 'String value too large.'
+NULL_CHARACTERS = 'Null characters are not allowed.'
+SURROGATE_CHARACTERS = 'Surrogate characters are not allowed: U+{code_point:X}.'
+
+# (key, attribute, min_length, max_length, custom messages)
+_CHAR_FIELDS = (
+    ('eventName', 'event_name', 3, 500, {
+        'min_length': 'Event name must be at least 3 characters long',
+        'max_length': 'Event name cannot exceed 500 characters',
+    }),
+    ('eventType', 'event_type', None, 100, {
+        'blank': 'Event type is required',
+    }),
+    ('location', 'location', 2, 200, {
+        'min_length': 'Location must be at least 2 characters long',
+        'max_length': 'Location cannot exceed 200 characters',
+    }),
+    ('speakers', 'speakers', 2, None, {
+        'min_length': 'Please mention at least some key people involved',
+    }),
+    ('keyLearnings', 'key_learnings', 10, None, {
+        'min_length': 'Please provide more detailed highlights (at least 10 characters)',
+    }),
+)
+
+# (key, attribute, choices, default)
+_CHOICE_FIELDS = (
+    ('length', 'length', ('short', 'medium', 'long'), 'medium'),
+    ('language', 'language', ('english', 'tanglish'), 'english'),
+    ('mode', 'mode', ('auto', 'template'), 'auto'),
+)
+
+# (key, attribute, min_value, max_value, default)
+_INTEGER_FIELDS = (
+    ('vibe', 'vibe', 0, 100, 50),
+)
+
+# Error keys are reported in the serializer's field declaration order
+_FIELD_ORDER = (
+    'eventName', 'eventType', 'location', 'speakers', 'keyLearnings', 'length', 'vibe', 'language', 'mode',
+)
+
+
+class CaptionInput(Mapping):
+    """
+    Validated caption request.
+
+    Immutable and slot-based. Readable by attribute (``event_name``) and,
+    for code written against request dicts, by the original camelCase key
+    (``data['eventName']``, ``data.get('mode')``).
+    """
+
+    __slots__ = (
+        'event_name', 'event_type', 'location', 'speakers', 'key_learnings',
+        'length', 'vibe', 'language', 'mode',
+    )
+
+    _KEYS = {
+        'eventName': 'event_name',
+        'eventType': 'event_type',
+        'location': 'location',
+        'speakers': 'speakers',
+        'keyLearnings': 'key_learnings',
+        'length': 'length',
+        'vibe': 'vibe',
+        'language': 'language',
+        'mode': 'mode',
+    }
+
+    def __init__(self, **values):
+        for attr in self.__slots__:
+            object.__setattr__(self, attr, values[attr])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self._KEYS[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+    def replace(self, **changes) -> 'CaptionInput':
+        """Copy with some (already validated) fields changed"""
+        unknown = set(changes) - set(self.__slots__)
+        if unknown:
+            raise TypeError(f"Unknown CaptionInput fields: {', '.join(sorted(unknown))}")
+        values = {attr: getattr(self, attr) for attr in self.__slots__}
+        values.update(changes)
+        return CaptionInput(**values)
+
+    def __repr__(self):
+        fields = ', '.join(f"{attr}={getattr(self, attr)!r}" for attr in self.__slots__)
+        return f"CaptionInput({fields})"
+
+
+def _check_char(value, min_length, max_length, messages) -> Tuple[Any, Optional[List[str]]]:
+    """Validate one CharField value the way DRF does (trimmed, non-blank)"""
+    if value is None:
+        return None, [NULL]
+    if value == '' or str(value).strip() == '':
+        return None, [messages.get('blank', BLANK)]
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        return None, [INVALID_STRING]
+
+    value = str(value).strip()
+    errors = []
+    if max_length is not None and len(value) > max_length:
+        errors.append(messages.get('max_length', MAX_LENGTH).format(max_length=max_length))
+    if min_length is not None and len(value) < min_length:
+        errors.append(messages.get('min_length', MIN_LENGTH).format(min_length=min_length))
+    if '\x00' in value:
+        errors.append(NULL_CHARACTERS)
+    surrogate = _SURROGATE.search(value)
+    if surrogate:
+        errors.append(SURROGATE_CHARACTERS.format(code_point=ord(surrogate.group())))
+    return value, errors or None
+
+
+def _check_integer(value, min_value, max_value) -> Tuple[Any, Optional[List[str]]]:
+    if value is None:
+        return None, [NULL]
+    if isinstance(value, str) and len(value) > _MAX_INT_STRING_LENGTH:
+        return None, [STRING_TOO_LARGE]
+    try:
+        value = int(_RE_DECIMAL.sub('', str(value)))
+    except (ValueError, TypeError):
+        return None, [INVALID_INTEGER]
+
+    errors = []
+    if max_value is not None and value > max_value:
+        errors.append(MAX_VALUE.format(max_value=max_value))
+    if min_value is not None and value < min_value:
+        errors.append(MIN_VALUE.format(min_value=min_value))
+    return value, errors or None
+
+
+def _check_choice(value, choices) -> Tuple[Any, Optional[List[str]]]:
+    if value is None:
+        return None, [NULL]
+    key = str(value)
+    if key in choices:
+        return key, None
+    return None, [INVALID_CHOICE.format(input=value)]
+
+
+def validate_caption_request(data) -> Tuple[Optional[CaptionInput], Optional[Dict[str, List[str]]]]:
+    """
+    Validate a generate-caption payload in one pass.
+
+    Returns ``(CaptionInput, None)`` on success or ``(None, errors)`` where
+    `errors` matches ``CaptionRequestSerializer.errors`` for the same input.
+    """
+    if data is None:
+        return None, {NON_FIELD_ERRORS_KEY: ['No data provided']}
+    if not isinstance(data, Mapping):
+        return None, {
+            NON_FIELD_ERRORS_KEY: [f'Invalid data. Expected a dictionary, but got {type(data).__name__}.']
+        }
+
+    values = {}
+    errors = {}
+
+    for key, attr, min_length, max_length, messages in _CHAR_FIELDS:
+        value = data.get(key, _MISSING)
+        if value is _MISSING:
+            errors[key] = [REQUIRED]
+            continue
+        values[attr], field_errors = _check_char(value, min_length, max_length, messages)
+        if field_errors:
+            errors[key] = field_errors
+
+    for key, attr, choices, default in _CHOICE_FIELDS:
+        value = data.get(key, _MISSING)
+        if value is _MISSING:
+            values[attr] = default
+            continue
+        values[attr], field_errors = _check_choice(value, choices)
+        if field_errors:
+            errors[key] = field_errors
+
+    for key, attr, min_value, max_value, default in _INTEGER_FIELDS:
+        value = data.get(key, _MISSING)
+        if value is _MISSING:
+            values[attr] = default
+            continue
+        values[attr], field_errors = _check_integer(value, min_value, max_value)
+        if field_errors:
+            errors[key] = field_errors
+
+    if errors:
+        return None, {key: errors[key] for key in _FIELD_ORDER if key in errors}
+
+    # Same checks as CaptionRequestSerializer.validate()
+    if not _ALNUM.search(values['event_name']):
+        return None, {'eventName': ['Event name must contain at least some alphanumeric characters']}
+    if not _THREE_WORDS.search(values['key_learnings']):
+        return None, {'keyLearnings': ['Please provide more detailed highlights with at least 3 words']}
+
+    return CaptionInput(**values), None
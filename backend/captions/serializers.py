@@ -2,7 +2,12 @@ from rest_framework import serializers
 
 
 class CaptionRequestSerializer(serializers.Serializer):
-    """Serializer for caption generation requests"""
+    """
+    Serializer for caption generation requests.
+
+    The generate-caption view validates with the equivalent single-pass
+    `captions.schemas.validate_caption_request`; keep both in sync.
+    """
     
     eventName = serializers.CharField(
         max_length=500, 
@@ -51,6 +56,11 @@ class CaptionRequestSerializer(serializers.Serializer):
         choices=['english', 'tanglish'],
         default='english'
     )
+    mode = serializers.ChoiceField(
+        choices=['auto', 'template'],
+        default='auto',
+        help_text="'template' skips the AI model and returns an instant template caption"
+    )
     
     def validate(self, data):
         """Additional validation logic"""
@@ -69,6 +79,41 @@ class CaptionRequestSerializer(serializers.Serializer):
         return data
 
 
+class CaptionRefineSerializer(serializers.Serializer):
+    """Serializer for refining the caption of an open regeneration session"""
+    
+    instruction = serializers.CharField(
+        max_length=500,
+        required=False,
+        allow_blank=True,
+        help_text="Free-form tweak, e.g. 'make it shorter'"
+    )
+    length = serializers.ChoiceField(
+        choices=['short', 'medium', 'long'],
+        required=False
+    )
+    vibe = serializers.IntegerField(
+        min_value=0,
+        max_value=100,
+        required=False
+    )
+    language = serializers.ChoiceField(
+        choices=['english', 'tanglish'],
+        required=False
+    )
+    
+    def validate(self, data):
+        """Require at least one change"""
+        if not data.get('instruction', '').strip() and not any(
+            field in data for field in ('length', 'vibe', 'language')
+        ):
+            raise serializers.ValidationError(
+                'Provide an instruction or a new length, vibe or language'
+            )
+        
+        return data
+
+
 class CaptionResponseSerializer(serializers.Serializer):
     """Serializer for caption generation responses"""
     
@@ -77,7 +122,16 @@ class CaptionResponseSerializer(serializers.Serializer):
     error = serializers.CharField(required=False)
     debug_message = serializers.CharField(required=False)
     processing_time = serializers.FloatField(required=False)
+    queue_time = serializers.FloatField(required=False)
+    generation_time = serializers.FloatField(required=False)
+    degraded = serializers.BooleanField(required=False)
+    degraded_reason = serializers.CharField(required=False)
+    model = serializers.CharField(required=False)
+    routing = serializers.DictField(required=False)
     request_id = serializers.UUIDField(required=False)
+    session_id = serializers.UUIDField(required=False)
+    turn = serializers.IntegerField(required=False)
+    prompt_chars = serializers.IntegerField(required=False)
 
 
 class HealthCheckSerializer(serializers.Serializer):
@@ -5,9 +5,74 @@ import logging
 from typing import Dict, Any, Optional
 from django.conf import settings
 
+from .event_loop import register_after_fork, run_coroutine
+from .model_router import ModelHandle, ModelRouter, RoutingExhausted
+from .template_composer import TemplateCaptionComposer
+
 logger = logging.getLogger(__name__)
 
 
+def determine_vibe_category(vibe_score: int) -> str:
+    """Determine vibe category based on score"""
+    if vibe_score <= 33:
+        return 'professional'
+    elif vibe_score <= 66:
+        return 'casual'
+    else:
+        return 'genz'
+
+
+# Hook templates for different vibes
+HOOKS = {
+    'professional': [
+        "Just wrapped up an incredible experience at {event}...",
+        "Key insights from {event} that every professional should know:",
+        "What I learned from {event} will change how I approach {field}:",
+        "The most valuable takeaway from {event}:",
+        "Three game-changing insights from {event}:",
+    ],
+    'casual': [
+        "Had an amazing time at {event}! 🚀",
+        "Just got back from {event} and wow...",
+        "Feeling inspired after {event}! ✨",
+        "What a journey at {event}! 💫",
+        "Still processing everything from {event}...",
+    ],
+    'genz': [
+        "Y'all, {event} just hit different! 🔥",
+        "Not me getting emotional about {event}... 😭✨",
+        "The {event} experience was absolutely unmatched! 💯",
+        "POV: You just attended the most incredible {event} 🎯",
+        "Tell me why {event} just changed my whole perspective 🤯",
+    ]
+}
+
+# Closing templates
+CLOSINGS = {
+    'professional': [
+        "Looking forward to implementing these insights!",
+        "Excited to apply these learnings in my journey ahead.",
+        "Ready to put these insights into action!",
+        "Can't wait to share more updates on this journey.",
+        "Onwards and upwards! 🚀",
+    ],
+    'casual': [
+        "More updates coming soon! 📈",
+        "Excited for what's next! 🌟",
+        "The journey continues! 💪",
+        "Stay tuned for more adventures! ✨",
+        "Grateful for this incredible experience! 🙏",
+    ],
+    'genz': [
+        "The glow up is real! ✨💅",
+        "Main character energy activated! 💫",
+        "Living my best life, one event at a time! 🌟",
+        "Plot twist: This was just the beginning! 📈",
+        "No cap, this was life-changing! 💯",
+    ]
+}
+
+
 class LinkedInCaptionGenerator:
     """
     Advanced LinkedIn Caption Generator using Google Gemini AI
@@ -21,66 +86,54 @@ class LinkedInCaptionGenerator:
             raise ValueError("Gemini API key not configured")
         
         genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
         
-        # Hook templates for different vibes
-        self.hooks = {
-            'professional': [
-                "Just wrapped up an incredible experience at {event}...",
-                "Key insights from {event} that every professional should know:",
-                "What I learned from {event} will change how I approach {field}:",
-                "The most valuable takeaway from {event}:",
-                "Three game-changing insights from {event}:",
+        # Route each request across the configured models (first is preferred)
+        router_config = getattr(settings, 'CAPTION_ROUTER', {})
+        model_names = getattr(settings, 'GEMINI_MODELS', None) or ['gemini-1.5-flash']
+        self.router = ModelRouter(
+            [
+                ModelHandle(
+                    name,
+                    genai.GenerativeModel(name),
+                    timeout=router_config.get('MODEL_TIMEOUT', 15.0),
+                    window=router_config.get('WINDOW', 50),
+                    sample_ttl=router_config.get('SAMPLE_TTL', 300.0),
+                )
+                for name in model_names
             ],
-            'casual': [
-                "Had an amazing time at {event}! 🚀",
-                "Just got back from {event} and wow...",
-                "Feeling inspired after {event}! ✨",
-                "What a journey at {event}! 💫",
-                "Still processing everything from {event}...",
-            ],
-            'genz': [
-                "Y'all, {event} just hit different! 🔥",
-                "Not me getting emotional about {event}... 😭✨",
-                "The {event} experience was absolutely unmatched! 💯",
-                "POV: You just attended the most incredible {event} 🎯",
-                "Tell me why {event} just changed my whole perspective 🤯",
-            ]
-        }
+            latency_budgets=router_config.get('LATENCY_BUDGETS'),
+            max_error_rate=router_config.get('MAX_ERROR_RATE', 0.5),
+            min_samples=router_config.get('MIN_SAMPLES', 5),
+            native_async=router_config.get('NATIVE_ASYNC', True),
+        )
         
-        # Closing templates
-        self.closings = {
-            'professional': [
-                "Looking forward to implementing these insights!",
-                "Excited to apply these learnings in my journey ahead.",
-                "Ready to put these insights into action!",
-                "Can't wait to share more updates on this journey.",
-                "Onwards and upwards! 🚀",
-            ],
-            'casual': [
-                "More updates coming soon! 📈",
-                "Excited for what's next! 🌟",
-                "The journey continues! 💪",
-                "Stay tuned for more adventures! ✨",
-                "Grateful for this incredible experience! 🙏",
-            ],
-            'genz': [
-                "The glow up is real! ✨💅",
-                "Main character energy activated! 💫",
-                "Living my best life, one event at a time! 🌟",
-                "Plot twist: This was just the beginning! 📈",
-                "No cap, this was life-changing! 💯",
-            ]
-        }
+        # gRPC channels are not fork-safe: a forked worker builds its own clients
+        register_after_fork(self._reset_upstream_clients)
+        
+        self.hooks = HOOKS
+        self.closings = CLOSINGS
+        
+        # Local template engine used when the upstream is slow or down
+        self.template_composer = TemplateCaptionComposer(self.hooks, self.closings)
+        degraded_config = getattr(settings, 'CAPTION_DEGRADED_MODE', {})
+        self.degraded_mode_enabled = degraded_config.get('ENABLED', True)
+        self.latency_slo = degraded_config.get('LATENCY_SLO', 20.0)
+    
+    @property
+    def model(self):
+        """The preferred (first configured) model"""
+        return self.router.primary.model
+    
+    def _reset_upstream_clients(self):
+        """Drop Gemini clients inherited from a parent process (after fork)"""
+        genai.configure(api_key=self.api_key)
+        for handle in self.router.handles:
+            if isinstance(handle.model, genai.GenerativeModel):
+                handle.model = genai.GenerativeModel(handle.name)
     
     def _determine_vibe_category(self, vibe_score: int) -> str:
         """Determine vibe category based on score"""
-        if vibe_score <= 33:
-            return 'professional'
-        elif vibe_score <= 66:
-            return 'casual'
-        else:
-            return 'genz'
+        return determine_vibe_category(vibe_score)
     
     def _get_length_guidelines(self, length: str) -> str:
         """Get length guidelines for the caption"""
@@ -163,6 +216,40 @@ Generate a caption that would genuinely get high engagement and help establish t
         
         return prompt
     
+    def create_session_context(self, data: Dict[str, Any]) -> str:
+        """Compact event brief that refinement turns build on (a fraction of the full prompt)"""
+        vibe_category = self._determine_vibe_category(data['vibe'])
+        field_context = self._detect_field_context(data['eventType'].lower(), data['keyLearnings'])
+        language_note = ""
+        if data['language'] == 'tanglish':
+            language_note = " (mix in Tamil words like 'vera level', 'semma' naturally)"
+        
+        return (
+            "You write engaging LinkedIn captions: hook, brief context, 2-3 insights, "
+            "personal touch, call to action, 5-8 hashtags.\n"
+            f"Event: {data['eventName']} ({data['eventType']}) in {data['location']}. "
+            f"Key people: {data['speakers']}.\n"
+            f"Highlights: {data['keyLearnings']}\n"
+            f"Style: {vibe_category.title()} vibe ({data['vibe']}/100), {data['length']} length, "
+            f"{data['language'].title()}{language_note}. Field: {field_context}."
+        )
+    
+    def _create_refinement_instruction(self, previous: Dict[str, Any], data: Dict[str, Any],
+                                       instruction: str = '') -> str:
+        """Delta instruction for a refinement: only what changes from the last caption"""
+        lines = ["Revise the caption above:"]
+        if data['vibe'] != previous['vibe']:
+            vibe_category = self._determine_vibe_category(data['vibe'])
+            lines.append(f"- Vibe: {vibe_category.title()} (Score: {data['vibe']}/100)")
+        if data['length'] != previous['length']:
+            lines.append(f"- Length: {data['length']} - {self._get_length_guidelines(data['length'])}")
+        if data['language'] != previous['language']:
+            lines.append(f"- Language: {data['language'].title()}")
+        if instruction:
+            lines.append(f"- {instruction}")
+        lines.append("Keep the facts and structure unless asked otherwise. Reply with the new caption only.")
+        return "\n".join(lines)
+    
     def _detect_field_context(self, event_type: str, key_learnings: str) -> str:
         """Detect the professional field context"""
         tech_keywords = ['ai', 'machine learning', 'tech', 'software', 'coding', 'development', 'startup', 'innovation']
@@ -197,10 +284,31 @@ Add these elements to ensure uniqueness (random seed: {random.randint(1000, 9999
 """
         return prompt + randomization_note
     
+    def compose_template_caption(self, data: Dict[str, Any], reason: str,
+                                 start_time: Optional[float] = None) -> Dict[str, Any]:
+        """Build a caption locally from the hook and closing templates (degraded mode)"""
+        start_time = start_time or time.time()
+        
+        vibe_category = self._determine_vibe_category(data['vibe'])
+        field_context = self._detect_field_context(data['eventType'].lower(), data['keyLearnings'])
+        caption = self.template_composer.compose(data, vibe_category, field_context)
+        
+        return {
+            'success': True,
+            'caption': caption,
+            'processing_time': time.time() - start_time,
+            'degraded': True,
+            'degraded_reason': reason,
+            'debug_message': f"Template caption served ({reason}) using {vibe_category} vibe"
+        }
+    
     async def generate_caption(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Generate a high-quality LinkedIn caption"""
         start_time = time.time()
         
+        if data.get('mode') == 'template':
+            return self.compose_template_caption(data, 'requested', start_time)
+        
         try:
             # Create and enhance prompt
             base_prompt = self._create_advanced_prompt(data)
@@ -208,11 +316,10 @@ Add these elements to ensure uniqueness (random seed: {random.randint(1000, 9999
             
             logger.info(f"Generating caption for event: {data['eventName']}")
             
-            # Generate content with Gemini
-            response = self.model.generate_content(enhanced_prompt)
-            
-            if not response.text:
-                raise ValueError("Empty response from Gemini API")
+            # Generate content with the routed model, bounded by the latency SLO
+            response, routing = await self.router.generate(
+                enhanced_prompt, data['length'], max_budget=self.latency_slo
+            )
             
             caption = response.text.strip()
             processing_time = time.time() - start_time
@@ -227,26 +334,109 @@ Add these elements to ensure uniqueness (random seed: {random.randint(1000, 9999
                 'success': True,
                 'caption': caption,
                 'processing_time': processing_time,
+                'degraded': False,
+                'model': routing['model'],
+                'routing': routing,
+                'prompt_chars': len(enhanced_prompt),
                 'debug_message': f"Generated using {self._determine_vibe_category(data['vibe'])} vibe"
             }
             
         except Exception as e:
             processing_time = time.time() - start_time
-            error_msg = f"Caption generation failed: {str(e)}"
+            if isinstance(e, RoutingExhausted) and e.timed_out:
+                reason = 'upstream_timeout'
+                error_msg = f"Caption generation exceeded its latency budget: {str(e)}"
+            else:
+                reason = 'upstream_error'
+                error_msg = f"Caption generation failed: {str(e)}"
+            
+            routing = e.decision if isinstance(e, RoutingExhausted) else None
+            
+            if self.degraded_mode_enabled:
+                logger.warning(f"{error_msg} - serving template caption")
+                result = self.compose_template_caption(data, reason, start_time)
+                result['routing'] = routing
+                # Kept for the request log; the response only carries the reason
+                result['upstream_error'] = error_msg
+                return result
+            
+            logger.error(error_msg)
+            
+            return {
+                'success': False,
+                'error': error_msg,
+                'processing_time': processing_time,
+                'routing': routing,
+                'debug_message': f"Error occurred after {processing_time:.2f}s"
+            }
+    
+    async def refine_caption(self, session, data: Dict[str, Any], instruction: str = '') -> Dict[str, Any]:
+        """
+        Refine a session's caption with a small delta instruction.
+        
+        `data` is the session's input with any vibe/length/language changes
+        applied. Only the compact context, the last caption and the delta are
+        sent; on success the session advances to the new caption. Failures
+        leave the session untouched and are not served from templates, since
+        a template would discard the caption being refined.
+        """
+        start_time = time.time()
+        
+        try:
+            message = self._create_refinement_instruction(session.caption_input, data, instruction)
+            contents = session.history(message)
+            
+            logger.info(f"Refining caption for event: {data['eventName']} (turn {session.turns + 1})")
+            
+            response, routing = await self.router.generate(
+                contents, data['length'], max_budget=self.latency_slo
+            )
+            
+            caption = response.text.strip()
+            processing_time = time.time() - start_time
+            
+            if len(caption) < 50:
+                raise ValueError("Refined caption too short")
+            
+            session.advance(data, self.create_session_context(data), caption)
+            logger.info(f"Caption refined successfully in {processing_time:.2f}s")
+            
+            return {
+                'success': True,
+                'caption': caption,
+                'processing_time': processing_time,
+                'degraded': False,
+                'model': routing['model'],
+                'routing': routing,
+                'prompt_chars': sum(len(part) for turn in contents for part in turn['parts']),
+                'debug_message': f"Refined using {self._determine_vibe_category(data['vibe'])} vibe"
+            }
+        
+        except Exception as e:
+            processing_time = time.time() - start_time
+            if isinstance(e, RoutingExhausted) and e.timed_out:
+                error_msg = f"Caption refinement exceeded its latency budget: {str(e)}"
+            else:
+                error_msg = f"Caption refinement failed: {str(e)}"
             logger.error(error_msg)
             
             return {
                 'success': False,
                 'error': error_msg,
                 'processing_time': processing_time,
+                'routing': e.decision if isinstance(e, RoutingExhausted) else None,
                 'debug_message': f"Error occurred after {processing_time:.2f}s"
             }
     
     def get_service_status(self) -> Dict[str, Any]:
         """Check service health and status"""
         try:
-            # Test API connection with a simple request
-            test_response = self.model.generate_content("Test connectivity - respond with 'OK'")
+            # Test API connection with a simple request, over the same client
+            # and event loop that serve caption generation
+            handle = self.router.primary
+            test_response = run_coroutine(
+                self.router.call(handle, "Test connectivity - respond with 'OK'", handle.timeout)
+            )
             
             return {
                 'status': 'healthy',
@@ -0,0 +1,118 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+from typing import Any, Callable, Coroutine, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundEventLoop:
+    """
+    A process-wide asyncio event loop running in a daemon thread.
+
+    Sync (WSGI) views submit coroutines with `run()` instead of calling
+    asyncio.run(), so the loop and anything bound to it (such as the async
+    Gemini client and its keep-alive channel) live for the whole process
+    rather than one request. The thread is started on first use, which keeps
+    a gunicorn --preload master free of it; a forked child discards any
+    loop inherited from its parent and starts its own.
+    """
+
+    def __init__(self, name: str = 'caption-event-loop'):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _serve(self, loop: asyncio.AbstractEventLoop, ready: threading.Event):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        """The running loop, starting the thread if needed"""
+        loop = self._loop
+        if loop is not None:
+            return loop
+
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+                thread = threading.Thread(target=self._serve, args=(loop, ready), name=self.name, daemon=True)
+                thread.start()
+                ready.wait()
+                self._loop, self._thread = loop, thread
+                logger.info(f"🔁 Background event loop started in process {os.getpid()}")
+            return self._loop
+
+    def in_loop(self) -> bool:
+        """True when called from a coroutine running on this loop"""
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the background loop and block until it finishes"""
+        if self.in_loop():
+            coro.close()
+            raise RuntimeError("BackgroundEventLoop.run() called from its own loop; await instead")
+
+        future = asyncio.run_coroutine_threadsafe(coro, self.get_loop())
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self):
+        """Stop the loop and wait for its thread (mainly for tests and shutdown)"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    def reset_after_fork(self):
+        """Forget a loop inherited from the parent; its thread does not exist here"""
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+
+
+background_loop = BackgroundEventLoop()
+
+_after_fork_callbacks: List[Callable[[], None]] = []
+
+
+def run_coroutine(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """Run a coroutine on the process-wide background loop from sync code"""
+    return background_loop.run(coro, timeout)
+
+
+def in_background_loop() -> bool:
+    return background_loop.in_loop()
+
+
+def register_after_fork(callback: Callable[[], None]):
+    """Call `callback` in a forked child, after the background loop was reset"""
+    _after_fork_callbacks.append(callback)
+
+
+def _reinitialize_after_fork():
+    background_loop.reset_after_fork()
+    for callback in _after_fork_callbacks:
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"After-fork reinitialisation failed: {e}")
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reinitialize_after_fork)
@@ -0,0 +1,280 @@
+import atexit
+import logging
+import threading
+import time
+from datetime import date
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, close_old_connections, transaction
+from django.db.models import F
+
+from ..models import CaptionAnalytics, CaptionLatencySketch
+from ..sketches import LatencySketch
+from .caption_generator import determine_vibe_category
+from .event_loop import register_after_fork
+
+logger = logging.getLogger(__name__)
+
+# Retries when a concurrent writer holds the database (SQLite "database is
+# locked") or created the same sketch row first
+MAX_WRITE_ATTEMPTS = 5
+RETRY_DELAY = 0.05
+
+
+OUTCOME_OK = 'ok'
+OUTCOME_DEGRADED = 'degraded'
+OUTCOME_FAILED = 'failed'
+
+
+def request_outcome(success: bool, degraded: bool) -> str:
+    """ok (model caption), degraded (template served instead) or failed"""
+    if not success:
+        return OUTCOME_FAILED
+    return OUTCOME_DEGRADED if degraded else OUTCOME_OK
+
+
+def sketch_dimensions(vibe: int, length: str, outcome: str) -> List[Tuple[str, str]]:
+    """(dimension, key) pairs a request is counted under"""
+    return [
+        (CaptionLatencySketch.DIMENSION_ALL, 'all'),
+        (CaptionLatencySketch.DIMENSION_VIBE, determine_vibe_category(vibe)),
+        (CaptionLatencySketch.DIMENSION_LENGTH, length),
+        (CaptionLatencySketch.DIMENSION_OUTCOME, outcome),
+    ]
+
+
+class _DayDelta:
+    """Counters and sketches for one day that are not yet in the database"""
+
+    __slots__ = ('requests', 'outcomes', 'total_time', 'sketches')
+
+    def __init__(self):
+        self.requests = 0
+        self.outcomes: Dict[str, int] = {OUTCOME_OK: 0, OUTCOME_DEGRADED: 0, OUTCOME_FAILED: 0}
+        self.total_time = 0.0
+        self.sketches: Dict[Tuple[str, str], LatencySketch] = {}
+
+    def add(self, processing_time: float, vibe: int, length: str, outcome: str):
+        processing_time = max(processing_time, 0.0)
+        self.requests += 1
+        self.outcomes[outcome] += 1
+        self.total_time += processing_time
+        for dimension in sketch_dimensions(vibe, length, outcome):
+            self.sketches.setdefault(dimension, LatencySketch()).add(processing_time)
+
+    def merge(self, other: '_DayDelta'):
+        self.requests += other.requests
+        for outcome, count in other.outcomes.items():
+            self.outcomes[outcome] += count
+        self.total_time += other.total_time
+        for dimension, sketch in other.sketches.items():
+            self.sketches.setdefault(dimension, LatencySketch()).merge(sketch)
+
+
+def _apply_delta(day: date, delta: _DayDelta, analytics_model, sketch_model):
+    """
+    Add a day's delta to the database in one transaction.
+
+    Counters are applied with F() increments, so concurrent processes never
+    overwrite each other. Sketch rows need a read-merge-write: row locks
+    protect it on databases that have them, and on SQLite a conflicting
+    writer makes the transaction fail with OperationalError. In both cases
+    the whole delta is retried, so nothing is counted twice or lost.
+    """
+    for attempt in range(1, MAX_WRITE_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                analytics, _ = analytics_model.objects.get_or_create(date=day)
+                analytics_model.objects.filter(pk=analytics.pk).update(
+                    avg_processing_time=(
+                        F('avg_processing_time') * F('total_requests') + delta.total_time
+                    ) / (F('total_requests') + delta.requests),
+                    total_requests=F('total_requests') + delta.requests,
+                    successful_requests=F('successful_requests') + delta.outcomes[OUTCOME_OK],
+                    degraded_requests=F('degraded_requests') + delta.outcomes[OUTCOME_DEGRADED],
+                    failed_requests=F('failed_requests') + delta.outcomes[OUTCOME_FAILED],
+                )
+
+                existing = {
+                    (row.dimension, row.key): row
+                    for row in sketch_model.objects.select_for_update().filter(analytics=analytics)
+                }
+                for (dimension, key), sketch in delta.sketches.items():
+                    row = existing.get((dimension, key))
+                    if row is None:
+                        sketch_model.objects.create(
+                            analytics=analytics, dimension=dimension, key=key,
+                            count=sketch.count, sketch=sketch.to_dict()
+                        )
+                        continue
+                    merged = LatencySketch.from_dict(row.sketch)
+                    merged.merge(sketch)
+                    row.sketch = merged.to_dict()
+                    row.count = merged.count
+                    row.save(update_fields=['sketch', 'count'])
+            return
+        except (OperationalError, IntegrityError) as e:
+            if attempt == MAX_WRITE_ATTEMPTS:
+                raise
+            logger.debug(f"Latency sketch write conflict ({e}); retrying")
+            time.sleep(RETRY_DELAY * 2 ** (attempt - 1))
+
+
+def record_latencies(day: date, samples: Iterable[Tuple[float, int, str, str]],
+                     analytics_model=CaptionAnalytics, sketch_model=CaptionLatencySketch):
+    """
+    Fold (processing_time, vibe, length, outcome) samples into a day's stats now.
+
+    Updates the day's CaptionAnalytics counters and average and merges the
+    samples into its per-dimension sketches (see _apply_delta). The model
+    arguments let data migrations pass historical models.
+    """
+    delta = _DayDelta()
+    for processing_time, vibe, length, outcome in samples:
+        delta.add(processing_time, vibe, length, outcome)
+    if delta.requests:
+        _apply_delta(day, delta, analytics_model, sketch_model)
+
+
+class LatencyRecorder:
+    """
+    Per-process buffer of latency samples, written in batches.
+
+    Requests only add to in-memory counters and sketches. A background thread
+    merges them into the database every `flush_interval` seconds, or sooner
+    once `max_pending` samples are buffered, so the row-locking write is off
+    the request path and happens once per batch rather than once per request.
+    Samples that cannot be written are kept for the next flush. Up to one
+    interval of samples is lost if the process is killed.
+
+    With `flush_interval=None` (or after stop()) there is no background
+    thread and samples are only written when the caller flushes. Use that
+    when other threads cannot see the database, e.g. in-memory SQLite.
+    """
+
+    def __init__(self, flush_interval: Optional[float] = 5.0, max_pending: int = 200):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._pending: Dict[date, _DayDelta] = {}
+        self._pending_count = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def reset_after_fork(self):
+        # The parent still owns (and will write) the samples it buffered
+        self._reset()
+
+    def add(self, day: date, processing_time: float, vibe: int, length: str, outcome: str):
+        with self._lock:
+            self._pending.setdefault(day, _DayDelta()).add(processing_time, vibe, length, outcome)
+            self._pending_count += 1
+            full = self._pending_count >= self.max_pending
+            if self._thread is None and self.flush_interval is not None:
+                self._stopping = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._stopping,), name='latency-recorder', daemon=True
+                )
+                self._thread.start()
+        if full:
+            self._wakeup.set()
+
+    def _run(self, stopping: threading.Event):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if stopping.is_set():
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush latency sketches: {e}")
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """Write everything buffered so far"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._pending_count = 0
+
+            failed = {}
+            for day, delta in pending.items():
+                try:
+                    _apply_delta(day, delta, CaptionAnalytics, CaptionLatencySketch)
+                except Exception as e:
+                    logger.error(f"Failed to write latency sketches for {day}: {e}")
+                    failed[day] = delta
+
+            if failed:
+                with self._lock:
+                    for day, delta in failed.items():
+                        self._pending.setdefault(day, _DayDelta()).merge(delta)
+                        self._pending_count += delta.requests
+
+    def stop(self):
+        """Stop the background thread and write what is buffered from this thread"""
+        with self._lock:
+            self.flush_interval = None
+            thread, self._thread = self._thread, None
+            stopping = self._stopping
+        if thread is not None:
+            stopping.set()
+            self._wakeup.set()
+            thread.join()
+        self.flush()
+
+
+latency_recorder = LatencyRecorder(
+    flush_interval=settings.CAPTION_ANALYTICS['FLUSH_INTERVAL'],
+    max_pending=settings.CAPTION_ANALYTICS['FLUSH_BATCH'],
+)
+register_after_fork(latency_recorder.reset_after_fork)
+atexit.register(latency_recorder.flush)
+
+
+def record_request_latency(caption_request):
+    """Write-path hook: buffer one saved CaptionRequest for its day's sketches"""
+    latency_recorder.add(
+        caption_request.created_at.date(), caption_request.processing_time,
+        caption_request.vibe, caption_request.length,
+        request_outcome(caption_request.success, caption_request.degraded)
+    )
+
+
+def latency_percentiles(start: date, end: Optional[date] = None) -> Dict[str, Any]:
+    """Merge stored sketches over [start, end] into p50/p90/p99 per dimension"""
+    rows = CaptionLatencySketch.objects.filter(analytics__date__gte=start)
+    if end is not None:
+        rows = rows.filter(analytics__date__lte=end)
+
+    merged: Dict[Tuple[str, str], LatencySketch] = {}
+    for dimension, key, sketch in rows.values_list('dimension', 'key', 'sketch').iterator():
+        if (dimension, key) in merged:
+            merged[(dimension, key)].merge(LatencySketch.from_dict(sketch))
+        else:
+            merged[(dimension, key)] = LatencySketch.from_dict(sketch)
+
+    overall = merged.get((CaptionLatencySketch.DIMENSION_ALL, 'all'), LatencySketch())
+    return {
+        'overall': overall.summary(),
+        'by_vibe': {
+            key: sketch.summary() for (dimension, key), sketch in sorted(merged.items())
+            if dimension == CaptionLatencySketch.DIMENSION_VIBE
+        },
+        'by_length': {
+            key: sketch.summary() for (dimension, key), sketch in sorted(merged.items())
+            if dimension == CaptionLatencySketch.DIMENSION_LENGTH
+        },
+        'by_outcome': {
+            key: sketch.summary() for (dimension, key), sketch in sorted(merged.items())
+            if dimension == CaptionLatencySketch.DIMENSION_OUTCOME
+        },
+    }
@@ -0,0 +1,300 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Union
+
+from .event_loop import in_background_loop, register_after_fork
+
+logger = logging.getLogger(__name__)
+
+# Sync-only backends (and calls made outside the background event loop) run
+# here rather than in asyncio's default executor so that a call abandoned
+# after a timeout does not hold up asyncio.run() shutting down, which waits
+# for the default executor.
+_upstream_executor = ThreadPoolExecutor(thread_name_prefix='gemini-upstream')
+
+
+def _reset_upstream_executor():
+    """Worker threads do not survive fork; give the child a fresh pool"""
+    global _upstream_executor
+    _upstream_executor = ThreadPoolExecutor(thread_name_prefix='gemini-upstream')
+
+
+register_after_fork(_reset_upstream_executor)
+
+DEFAULT_LATENCY_BUDGETS = {
+    'short': 8.0,
+    'medium': 12.0,
+    'long': 20.0,
+}
+
+
+class RoutingExhausted(Exception):
+    """Raised when every candidate model failed or the latency budget ran out"""
+
+    def __init__(self, message: str, timed_out: bool, decision: Dict[str, Any]):
+        super().__init__(message)
+        self.timed_out = timed_out
+        self.decision = decision
+
+
+class ModelStats:
+    """
+    Rolling latency and error profile of one model, overall and per length.
+
+    Samples older than `sample_ttl` seconds are ignored, so a model that was
+    routed around because it was slow or failing gets retried once its bad
+    samples expire.
+    """
+
+    def __init__(self, window: int = 50, sample_ttl: float = 300.0):
+        self.window = window
+        self.sample_ttl = sample_ttl
+        self._samples = deque(maxlen=window)
+        self._by_length: Dict[str, deque] = {}
+        self.total_requests = 0
+        self.total_errors = 0
+        self.total_timeouts = 0
+
+    def record(self, length: str, latency: float, outcome: str):
+        """Record one call; outcome is 'ok', 'error' or 'timeout'"""
+        sample = (time.monotonic(), latency, outcome)
+        self._samples.append(sample)
+        self._by_length.setdefault(length, deque(maxlen=self.window)).append(sample)
+        self.total_requests += 1
+        if outcome == 'error':
+            self.total_errors += 1
+        elif outcome == 'timeout':
+            self.total_timeouts += 1
+
+    def _recent(self, samples) -> list:
+        cutoff = time.monotonic() - self.sample_ttl
+        return [(latency, outcome) for ts, latency, outcome in samples if ts >= cutoff]
+
+    def sample_count(self) -> int:
+        return len(self._recent(self._samples))
+
+    def latency_percentile(self, percentile: float, length: Optional[str] = None,
+                           min_samples: int = 1) -> Optional[float]:
+        """
+        Latency percentile of recent calls, overall or for one length.
+
+        Lengths are profiled separately because generation time grows with
+        caption length; a length without enough samples reports None so the
+        router explores it rather than guessing from other lengths.
+
+        Timeouts count with the time waited (a lower bound of their real
+        latency) so a model that keeps timing out looks slow, not unknown.
+        """
+        samples = self._recent(self._by_length.get(length, ()) if length else self._samples)
+        latencies = sorted(latency for latency, outcome in samples if outcome != 'error')
+        if not latencies or len(latencies) < min_samples:
+            return None
+        index = min(len(latencies) - 1, int(round(percentile / 100.0 * (len(latencies) - 1))))
+        return latencies[index]
+
+    def error_rate(self) -> float:
+        """Share of recent calls that errored (timeouts show up in latency instead)"""
+        samples = self._recent(self._samples)
+        if not samples:
+            return 0.0
+        return sum(1 for _, outcome in samples if outcome == 'error') / len(samples)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'window_samples': self.sample_count(),
+            'error_rate': self.error_rate(),
+            'p50_latency': self.latency_percentile(50),
+            'p90_latency': self.latency_percentile(90),
+            'p90_latency_by_length': {
+                length: self.latency_percentile(90, length) for length in sorted(self._by_length)
+            },
+            'total_requests': self.total_requests,
+            'total_errors': self.total_errors,
+            'total_timeouts': self.total_timeouts,
+        }
+
+
+class ModelHandle:
+    """A configured upstream model plus its rolling stats"""
+
+    def __init__(self, name: str, model, timeout: float = 15.0, window: int = 50,
+                 sample_ttl: float = 300.0):
+        self.name = name
+        self.model = model
+        self.timeout = timeout
+        self.stats = ModelStats(window, sample_ttl)
+
+
+class ModelRouter:
+    """
+    Routes each generation to one of several configured models.
+
+    Candidates keep their configured preference order, but models whose
+    rolling p90 latency for the request's length does not fit the latency
+    budget are moved behind those that do, and models whose recent error
+    rate exceeds `max_error_rate` are only tried as a last resort. On
+    timeout or error the router cascades to the next candidate with
+    whatever budget is left.
+    """
+
+    def __init__(
+        self,
+        handles: List[ModelHandle],
+        latency_budgets: Optional[Dict[str, float]] = None,
+        max_error_rate: float = 0.5,
+        min_samples: int = 5,
+        executor: Optional[ThreadPoolExecutor] = None,
+        history: int = 50,
+        native_async: bool = True,
+    ):
+        if not handles:
+            raise ValueError("At least one model must be configured")
+
+        self.handles = handles
+        self.latency_budgets = {**DEFAULT_LATENCY_BUDGETS, **(latency_budgets or {})}
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.native_async = native_async
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._decisions = deque(maxlen=history)
+
+    @property
+    def primary(self) -> ModelHandle:
+        return self.handles[0]
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # Resolved per call so a forked child picks up its own pool
+        return self._executor or _upstream_executor
+
+    async def call(self, handle: ModelHandle, prompt, timeout: float):
+        """
+        One upstream call to `handle`, bounded by `timeout`.
+
+        On the background event loop, backends with generate_content_async
+        (the Gemini client) are awaited directly and share one long-lived
+        async channel. Elsewhere, or for sync-only backends, the blocking
+        generate_content runs on the upstream thread pool.
+        """
+        if self.native_async and in_background_loop() and hasattr(handle.model, 'generate_content_async'):
+            call = handle.model.generate_content_async(prompt)
+        else:
+            call = asyncio.get_running_loop().run_in_executor(
+                self.executor, handle.model.generate_content, prompt
+            )
+        return await asyncio.wait_for(call, timeout=timeout)
+
+    def budget_for(self, length: str, max_budget: Optional[float] = None) -> float:
+        """Latency budget (seconds) for a request of the given length"""
+        budget = self.latency_budgets.get(length, self.latency_budgets['medium'])
+        return min(budget, max_budget) if max_budget else budget
+
+    def plan(self, length: str, budget: float) -> List[Dict[str, Any]]:
+        """Order candidate models for a request and explain each placement"""
+        fitting, slow, unhealthy = [], [], []
+        with self._lock:
+            for handle in self.handles:
+                stats = handle.stats
+                estimate = stats.latency_percentile(90, length, self.min_samples)
+                error_rate = stats.error_rate()
+                entry = {'handle': handle, 'estimated_latency': estimate, 'error_rate': error_rate}
+
+                if stats.sample_count() >= self.min_samples and error_rate > self.max_error_rate:
+                    entry['reason'] = 'unhealthy'
+                    unhealthy.append(entry)
+                elif estimate is not None and estimate > budget:
+                    entry['reason'] = 'over_budget'
+                    slow.append(entry)
+                else:
+                    entry['reason'] = 'fits_budget' if estimate is not None else 'no_data'
+                    fitting.append(entry)
+
+        slow.sort(key=lambda e: e['estimated_latency'])
+        unhealthy.sort(key=lambda e: e['error_rate'])
+        return fitting + slow + unhealthy
+
+    async def generate(self, prompt: Union[str, List[Dict[str, Any]]], length: str,
+                       max_budget: Optional[float] = None):
+        """
+        Generate content, cascading across models; returns (response, decision)
+
+        `prompt` is a prompt string or a list of conversation turns, passed
+        through to the backend's generate_content.
+        """
+        budget = self.budget_for(length, max_budget)
+        candidates = self.plan(length, budget)
+        deadline = time.monotonic() + budget
+
+        decision = {
+            'length': length,
+            'budget': budget,
+            'candidates': [
+                {'model': c['handle'].name, 'reason': c['reason'], 'estimated_latency': c['estimated_latency']}
+                for c in candidates
+            ],
+            'attempts': [],
+            'model': None,
+        }
+
+        timed_out = False
+        for candidate in candidates:
+            handle = candidate['handle']
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+
+            timeout = min(handle.timeout, remaining)
+            start = time.monotonic()
+            try:
+                response = await self.call(handle, prompt, timeout)
+                if not response.text:
+                    raise ValueError("Empty response from Gemini API")
+                outcome, error = 'ok', None
+            except asyncio.TimeoutError:
+                outcome, error = 'timeout', f"timed out after {timeout:.2f}s"
+                timed_out = True
+            except Exception as e:
+                outcome, error = 'error', str(e)
+                timed_out = False
+
+            latency = time.monotonic() - start
+            with self._lock:
+                handle.stats.record(length, latency, outcome)
+            decision['attempts'].append({
+                'model': handle.name, 'outcome': outcome, 'latency': latency, 'error': error
+            })
+
+            if outcome == 'ok':
+                decision['model'] = handle.name
+                with self._lock:
+                    self._decisions.append(decision)
+                return response, decision
+
+            logger.warning(f"Model {handle.name} {outcome} ({error}); cascading to next model")
+
+        with self._lock:
+            self._decisions.append(decision)
+        attempted = ', '.join(f"{a['model']}: {a['outcome']}" for a in decision['attempts']) or 'none'
+        raise RoutingExhausted(
+            f"All models failed within the {budget:.1f}s budget ({attempted})",
+            timed_out=timed_out,
+            decision=decision,
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-model rolling stats and the most recent routing decisions"""
+        with self._lock:
+            return {
+                'latency_budgets': dict(self.latency_budgets),
+                'models': {
+                    handle.name: {'timeout': handle.timeout, **handle.stats.snapshot()}
+                    for handle in self.handles
+                },
+                'recent_decisions': list(self._decisions)[-10:],
+            }
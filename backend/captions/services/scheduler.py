@@ -0,0 +1,251 @@
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BATCH = 'batch'
+PRIORITY_CLASSES = (PRIORITY_INTERACTIVE, PRIORITY_BATCH)
+
+# Relative upstream cost of each caption length (a long post is roughly
+# four times the generated tokens of a short one)
+LENGTH_COST = {
+    'short': 1.0,
+    'medium': 2.0,
+    'long': 4.0,
+}
+
+# Characters of input that add one extra unit of cost
+INPUT_CHARS_PER_COST_UNIT = 2000
+
+
+class SchedulerTimeout(Exception):
+    """Raised when a request waits in the queue longer than allowed"""
+
+
+def estimate_cost(data: Dict[str, Any]) -> float:
+    """Estimate the relative upstream cost of a caption request"""
+    base = LENGTH_COST.get(data.get('length'), LENGTH_COST['medium'])
+    input_chars = sum(
+        len(str(data.get(field) or ''))
+        for field in ('eventName', 'eventType', 'location', 'speakers', 'keyLearnings')
+    )
+    return base * (1.0 + input_chars / INPUT_CHARS_PER_COST_UNIT)
+
+
+class _Ticket:
+    """A single request waiting for (or holding) a generation slot"""
+
+    __slots__ = ('seq', 'client_id', 'priority', 'cost', 'enqueued_at', 'granted_at', 'granted')
+
+    def __init__(self, seq: int, client_id: str, priority: str, cost: float):
+        self.seq = seq
+        self.client_id = client_id
+        self.priority = priority
+        self.cost = cost
+        self.enqueued_at = time.monotonic()
+        self.granted_at: Optional[float] = None
+        self.granted = False
+
+    @property
+    def queue_time(self) -> float:
+        """Seconds spent waiting before the slot was granted"""
+        end = self.granted_at if self.granted_at is not None else time.monotonic()
+        return end - self.enqueued_at
+
+
+class CaptionScheduler:
+    """
+    Admission scheduler in front of the caption generator.
+
+    Limits the number of concurrent upstream generations and, when all
+    slots are busy, hands the next free slot to the waiting request with
+    the lowest score:
+
+        score = class penalty + estimated cost + client share - aging bonus
+
+    Batch requests carry a fixed penalty so interactive requests go first,
+    cheap requests beat expensive ones, clients that already received a lot
+    of work are pushed back (fair queuing on served cost), and every second
+    spent waiting lowers the score so nothing starves.
+
+    The scheduler is per process and coordinates threads. It only has an
+    effect when a process serves several requests at once: run gunicorn with
+    threaded workers (``--worker-class gthread --threads N``, N above
+    `max_concurrent`). Under sync workers each process handles one request
+    at a time, nothing ever queues, and priorities, fair queuing and aging
+    never apply. The limit is also per process, so the upstream sees at most
+    workers x `max_concurrent` concurrent generations.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_queue_wait: float = 30.0,
+        aging_rate: float = 1.0,
+        batch_penalty: float = 10.0,
+        fairness_weight: float = 1.0,
+    ):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+
+        self.max_concurrent = max_concurrent
+        self.max_queue_wait = max_queue_wait
+        self.aging_rate = aging_rate
+        self.batch_penalty = batch_penalty
+        self.fairness_weight = fairness_weight
+
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._waiting: List[_Ticket] = []
+        self._running = 0
+        # Served cost per client with queued or running work
+        self._client_served: Dict[str, float] = {}
+        self._client_active: Dict[str, int] = {}
+
+        self._stats = {
+            PRIORITY_INTERACTIVE: self._empty_class_stats(),
+            PRIORITY_BATCH: self._empty_class_stats(),
+        }
+
+    @staticmethod
+    def _empty_class_stats() -> Dict[str, Any]:
+        return {
+            'admitted': 0,
+            'completed': 0,
+            'rejected': 0,
+            'total_queue_time': 0.0,
+            'max_queue_time': 0.0,
+            'total_generation_time': 0.0,
+        }
+
+    def _score(self, ticket: _Ticket, now: float, min_served: float) -> float:
+        """Lower scores are scheduled first"""
+        penalty = self.batch_penalty if ticket.priority == PRIORITY_BATCH else 0.0
+        share = self._client_served.get(ticket.client_id, 0.0) - min_served
+        aging = self.aging_rate * (now - ticket.enqueued_at)
+        return penalty + ticket.cost + self.fairness_weight * share - aging
+
+    def _grant_next(self):
+        """Hand free slots to the best waiting tickets (lock must be held)"""
+        while self._waiting and self._running < self.max_concurrent:
+            now = time.monotonic()
+            min_served = min(self._client_served[t.client_id] for t in self._waiting)
+            best = min(
+                self._waiting,
+                key=lambda t: (self._score(t, now, min_served), t.seq)
+            )
+            self._waiting.remove(best)
+            self._grant(best, now)
+        self._cond.notify_all()
+
+    def _grant(self, ticket: _Ticket, now: float):
+        ticket.granted = True
+        ticket.granted_at = now
+        self._running += 1
+        self._client_served[ticket.client_id] += ticket.cost
+
+    def _register_client(self, client_id: str):
+        if client_id not in self._client_served:
+            # New clients join at the current minimum so they neither jump
+            # the queue nor pay for history they were not part of
+            active = self._client_served.values()
+            self._client_served[client_id] = min(active) if active else 0.0
+            self._client_active[client_id] = 0
+        self._client_active[client_id] += 1
+
+    def _release_client(self, client_id: str):
+        self._client_active[client_id] -= 1
+        if self._client_active[client_id] <= 0:
+            del self._client_active[client_id]
+            del self._client_served[client_id]
+
+    def acquire(self, client_id: str, priority: str, cost: float, timeout: Optional[float] = None) -> _Ticket:
+        """Block until a generation slot is available and return its ticket"""
+        if priority not in PRIORITY_CLASSES:
+            priority = PRIORITY_INTERACTIVE
+        timeout = self.max_queue_wait if timeout is None else timeout
+
+        with self._cond:
+            ticket = _Ticket(next(self._seq), client_id or 'anonymous', priority, cost)
+            self._register_client(ticket.client_id)
+
+            if not self._waiting and self._running < self.max_concurrent:
+                self._grant(ticket, ticket.enqueued_at)
+            else:
+                self._waiting.append(ticket)
+                deadline = ticket.enqueued_at + timeout
+                while not ticket.granted:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._waiting.remove(ticket)
+                        self._release_client(ticket.client_id)
+                        self._stats[priority]['rejected'] += 1
+                        logger.warning(
+                            f"Scheduler rejected {priority} request from {ticket.client_id} "
+                            f"after {ticket.queue_time:.2f}s in queue"
+                        )
+                        raise SchedulerTimeout(
+                            f"Request waited {ticket.queue_time:.2f}s in the {priority} queue"
+                        )
+                    self._cond.wait(remaining)
+
+            stats = self._stats[priority]
+            stats['admitted'] += 1
+            stats['total_queue_time'] += ticket.queue_time
+            stats['max_queue_time'] = max(stats['max_queue_time'], ticket.queue_time)
+
+        return ticket
+
+    def release(self, ticket: _Ticket):
+        """Return a slot to the pool and wake up the next waiting request"""
+        with self._cond:
+            self._running -= 1
+            stats = self._stats[ticket.priority]
+            stats['completed'] += 1
+            stats['total_generation_time'] += time.monotonic() - ticket.granted_at
+            self._release_client(ticket.client_id)
+            self._grant_next()
+
+    @contextmanager
+    def slot(self, client_id: str, priority: str, cost: float, timeout: Optional[float] = None):
+        """Context manager wrapping acquire()/release()"""
+        ticket = self.acquire(client_id, priority, cost, timeout)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of queue depth and per-class wait/generation times"""
+        with self._cond:
+            queued = {name: 0 for name in PRIORITY_CLASSES}
+            for ticket in self._waiting:
+                queued[ticket.priority] += 1
+
+            classes = {}
+            for name, stats in self._stats.items():
+                admitted = stats['admitted']
+                completed = stats['completed']
+                classes[name] = {
+                    'admitted': admitted,
+                    'completed': completed,
+                    'rejected': stats['rejected'],
+                    'queued': queued[name],
+                    'avg_queue_time': stats['total_queue_time'] / admitted if admitted else 0.0,
+                    'max_queue_time': stats['max_queue_time'],
+                    'avg_generation_time': stats['total_generation_time'] / completed if completed else 0.0,
+                }
+
+            return {
+                'max_concurrent': self.max_concurrent,
+                'running': self._running,
+                'queued': len(self._waiting),
+                'active_clients': len(self._client_active),
+                'classes': classes,
+            }
@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+
+class RegenerationSession:
+    """Server-side context for refining one generated caption"""
+
+    __slots__ = ('session_id', 'caption_input', 'context', 'caption', 'turns',
+                 'created_at', 'last_used', 'lock', 'size', 'store')
+
+    def __init__(self, session_id: str, caption_input, context: str, caption: str):
+        self.session_id = session_id
+        self.caption_input = caption_input
+        self.context = context
+        self.caption = caption
+        self.turns = 0
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        # Refinements of one session are applied one at a time
+        self.lock = threading.Lock()
+        self.size = self._measure()
+        self.store: Optional['RegenerationSessionStore'] = None
+
+    def _measure(self) -> int:
+        return len(self.context.encode('utf-8')) + len(self.caption.encode('utf-8'))
+
+    def advance(self, caption_input, context: str, caption: str):
+        """Record a successful refinement as the new state of the session"""
+        self.caption_input = caption_input
+        self.context = context
+        self.caption = caption
+        self.turns += 1
+        store = self.store
+        if store is not None:
+            store.resize(self, self._measure())
+        else:
+            self.size = self._measure()
+
+    def history(self, instruction: str) -> List[Dict[str, Any]]:
+        """
+        Conversation to send for the next refinement.
+
+        Only the compact event context and the latest caption are kept: the
+        latest caption already reflects every earlier tweak, so memory and
+        resent tokens stay flat no matter how many turns the session has.
+        """
+        return [
+            {'role': 'user', 'parts': [self.context]},
+            {'role': 'model', 'parts': [self.caption]},
+            {'role': 'user', 'parts': [instruction]},
+        ]
+
+
+class RegenerationSessionStore:
+    """
+    Bounded in-process store of regeneration sessions.
+
+    Least recently used sessions are evicted once there are more than
+    `max_sessions` or their context and captions take more than `max_bytes`
+    (UTF-8), sessions idle for longer than `ttl` seconds expire, and a
+    session accepts at most `max_turns` refinements.
+
+    Sessions live in the process that generated the caption. Under several
+    worker processes a refinement routed to another worker finds no session.
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl: float = 1800.0, max_turns: int = 10,
+                 max_bytes: int = 8_000_000):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self._sessions: 'OrderedDict[str, RegenerationSession]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._evicted = 0
+        self._expired = 0
+
+    def _purge_expired(self, now: float):
+        """Drop idle sessions from the LRU end (lock must be held)"""
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.ttl:
+                break
+            self._remove(session_id)
+            self._expired += 1
+
+    def _remove(self, session_id: str) -> Optional[RegenerationSession]:
+        """Forget a session (lock must be held)"""
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._bytes -= session.size
+            session.store = None
+        return session
+
+    def _evict(self, keep: str):
+        """Drop LRU sessions, never `keep`, until within both limits (lock must be held)"""
+        while len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes:
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                if len(self._sessions) == 1:
+                    break
+                self._sessions.move_to_end(keep)
+                continue
+            self._remove(session_id)
+            self._evicted += 1
+
+    def open(self, session_id: str, caption_input, context: str, caption: str) -> RegenerationSession:
+        """Start (or restart) the session for a freshly generated caption"""
+        session = RegenerationSession(session_id, caption_input, context, caption)
+        with self._lock:
+            self._purge_expired(session.created_at)
+            self._remove(session_id)
+            self._sessions[session_id] = session
+            self._bytes += session.size
+            session.store = self
+            self._evict(keep=session_id)
+        return session
+
+    def resize(self, session: RegenerationSession, size: int):
+        """Update a session's size after its context or caption changed"""
+        with self._lock:
+            if session.store is not self:
+                session.size = size
+                return
+            self._bytes += size - session.size
+            session.size = size
+            self._evict(keep=session.session_id)
+
+    def get(self, session_id: str) -> Optional[RegenerationSession]:
+        """Return a live session and mark it as recently used"""
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            session.last_used = now
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def close(self, session_id: str):
+        with self._lock:
+            self._remove(session_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            return {
+                'active_sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'max_turns': self.max_turns,
+                'evicted': self._evicted,
+                'expired': self._expired,
+            }
@@ -0,0 +1,129 @@
+import random
+import re
+from typing import Dict, Any, List
+
+
+# How many insight bullets each caption length gets
+BULLETS_PER_LENGTH = {
+    'short': 2,
+    'medium': 3,
+    'long': 5,
+}
+
+CONTEXT_TEMPLATES = {
+    'professional': "It was a privilege to attend {event} in {location}, with valuable perspectives from {speakers}.",
+    'casual': "Spent an amazing time at {event} in {location} with {speakers}.",
+    'genz': "Pulled up to {event} in {location} and {speakers} absolutely delivered.",
+}
+
+INSIGHT_HEADERS = {
+    'professional': "Key takeaways:",
+    'casual': "What stood out for me:",
+    'genz': "The highlights fr:",
+}
+
+BULLET_MARKERS = {
+    'professional': "▪️",
+    'casual': "✅",
+    'genz': "🔥",
+}
+
+TANGLISH_FLAVOR = {
+    'professional': "Truly a semma learning experience.",
+    'casual': "Semma experience, vera level vibes!",
+    'genz': "Vera level, no cap! 🔥",
+}
+
+FIELD_HASHTAGS = {
+    'technology/innovation': ['#Technology', '#Innovation'],
+    'business/entrepreneurship': ['#Business', '#Entrepreneurship'],
+    'academic/research': ['#Research', '#Education'],
+    'professional development': ['#ProfessionalDevelopment', '#Growth'],
+}
+
+MAX_HASHTAGS = 8
+
+_LEARNING_SEPARATORS = re.compile(r'\s*(?:\n+|;|•|(?<=[.!?])\s+)\s*')
+_NON_WORD = re.compile(r'[^0-9A-Za-z]+')
+
+
+class TemplateCaptionComposer:
+    """
+    Builds a structured LinkedIn caption locally from hook/closing tables.
+
+    Used as an instant degraded mode when the upstream model is slow or
+    unavailable. The output follows the same structure the model is asked
+    for: hook, context, insight bullets, closing and hashtags.
+    """
+
+    def __init__(self, hooks: Dict[str, List[str]], closings: Dict[str, List[str]]):
+        self.hooks = hooks
+        self.closings = closings
+
+    def _split_learnings(self, key_learnings: str, limit: int) -> List[str]:
+        """Split free-form highlights into short bullet points"""
+        parts = [p for p in _LEARNING_SEPARATORS.split(key_learnings) if p]
+        if len(parts) == 1 and ',' in parts[0]:
+            parts = parts[0].split(',')
+
+        bullets = []
+        for part in parts:
+            part = part.strip().strip('-*•').strip().rstrip('.;,')
+            if len(part) < 3:
+                continue
+            bullets.append(part[0].upper() + part[1:])
+            if len(bullets) == limit:
+                break
+        return bullets
+
+    def _hashtags(self, data: Dict[str, Any], field_context: str) -> List[str]:
+        """Derive hashtags from event name, type, location and field"""
+        candidates = []
+
+        name_words = [w for w in _NON_WORD.split(data['eventName']) if w][:4]
+        if name_words:
+            candidates.append('#' + ''.join(w[0].upper() + w[1:] for w in name_words))
+
+        for source in (data['eventType'], data['location'].split(',')[0]):
+            words = [w for w in _NON_WORD.split(source) if w]
+            if words:
+                candidates.append('#' + ''.join(w[0].upper() + w[1:] for w in words))
+
+        candidates.extend(FIELD_HASHTAGS.get(field_context, FIELD_HASHTAGS['professional development']))
+        candidates.extend(['#LinkedIn', '#Learning', '#Networking'])
+
+        seen = set()
+        hashtags = []
+        for tag in candidates:
+            key = tag.lower()
+            if len(tag) > 1 and key not in seen:
+                seen.add(key)
+                hashtags.append(tag)
+        return hashtags[:MAX_HASHTAGS]
+
+    def compose(self, data: Dict[str, Any], vibe_category: str, field_context: str) -> str:
+        """Assemble a caption from the templates and the request data"""
+        event = data['eventName']
+        field = field_context.split('/')[0]
+
+        hook = random.choice(self.hooks[vibe_category]).format(event=event, field=field)
+        context = CONTEXT_TEMPLATES[vibe_category].format(
+            event=event, location=data['location'], speakers=data['speakers']
+        )
+        if data.get('language') == 'tanglish':
+            context = f"{context} {TANGLISH_FLAVOR[vibe_category]}"
+
+        limit = BULLETS_PER_LENGTH.get(data.get('length'), BULLETS_PER_LENGTH['medium'])
+        marker = BULLET_MARKERS[vibe_category]
+        bullets = '\n'.join(
+            f"{marker} {bullet}" for bullet in self._split_learnings(data['keyLearnings'], limit)
+        )
+
+        sections = [
+            hook,
+            context,
+            f"{INSIGHT_HEADERS[vibe_category]}\n{bullets}" if bullets else '',
+            random.choice(self.closings[vibe_category]),
+            ' '.join(self._hashtags(data, field_context)),
+        ]
+        return '\n\n'.join(section for section in sections if section)
@@ -0,0 +1,151 @@
+"""
+Mergeable quantile sketch for latency analytics.
+
+`LatencySketch` is a DDSketch: values are counted in logarithmic buckets so
+every quantile it reports is within `relative_accuracy` (1% by default) of
+the true value, its size does not grow with the number of values, and two
+sketches merge exactly by adding bucket counts. That lets each day, vibe
+category and length keep its own small sketch that can be combined over any
+window without touching raw rows.
+"""
+
+import math
+from typing import Dict, Any, Optional
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_MAX_BUCKETS = 2048
+
+# Values at or below this (seconds) are counted as zero
+MIN_INDEXABLE_VALUE = 1e-6
+
+
+class LatencySketch:
+    """DDSketch over non-negative values (processing times in seconds)"""
+
+    __slots__ = ('relative_accuracy', 'max_buckets', '_gamma', '_log_gamma',
+                 'buckets', 'zero_count', 'count', 'sum', 'min', 'max')
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+                 max_buckets: int = DEFAULT_MAX_BUCKETS):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        # Midpoint (in relative terms) of the bucket (gamma^(i-1), gamma^i]
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def add(self, value: float, count: int = 1):
+        """Add `value` to the sketch `count` times"""
+        if value < 0:
+            raise ValueError("LatencySketch only accepts non-negative values")
+
+        if value <= MIN_INDEXABLE_VALUE:
+            self.zero_count += count
+        else:
+            index = self._index(value)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+            if len(self.buckets) > self.max_buckets:
+                self._collapse()
+
+        self.count += count
+        self.sum += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def _collapse(self):
+        """Fold the lowest buckets together to respect max_buckets"""
+        indexes = sorted(self.buckets)
+        excess = len(indexes) - self.max_buckets
+        target = indexes[excess]
+        self.buckets[target] += sum(self.buckets.pop(i) for i in indexes[:excess])
+
+    def merge(self, other: 'LatencySketch'):
+        """Add every value of `other` to this sketch"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        if not other.count:
+            return
+
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate value at quantile `q` (0..1), or None if empty"""
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+
+        seen = self.zero_count
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # Never report outside the observed range
+                return min(max(self._value(index), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def summary(self) -> Dict[str, Any]:
+        """Count, mean and p50/p90/p99 suitable for API responses"""
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'p50': self.quantile(0.50),
+            'p90': self.quantile(0.90),
+            'p99': self.quantile(0.99),
+            'max': self.max,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serialisable representation (see from_dict)"""
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'buckets': {str(index): count for index, count in self.buckets.items()},
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'LatencySketch':
+        sketch = cls((data or {}).get('relative_accuracy', DEFAULT_RELATIVE_ACCURACY))
+        if not data:
+            return sketch
+        sketch.buckets = {int(index): count for index, count in data.get('buckets', {}).items()}
+        sketch.zero_count = data.get('zero_count', 0)
+        sketch.count = data.get('count', 0)
+        sketch.sum = data.get('sum', 0.0)
+        sketch.min = data.get('min')
+        sketch.max = data.get('max')
+        return sketch
@@ -0,0 +1,590 @@
+import gzip
+import io
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, time as time_of_day, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse, JsonResponse
+from django.db.migrations.executor import MigrationExecutor
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from .compression import TAG_PLAIN, decompress_text
+from .fields import CompressedText
+from .middleware import CompressionMiddleware, brotli
+from .models import CaptionAnalytics, CaptionLatencySketch, CaptionRequest
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer
+from . import views
+from .schemas import CaptionInput, validate_caption_request
+from .serializers import CaptionRequestSerializer
+from .services.latency_analytics import LatencyRecorder, latency_percentiles, latency_recorder
+from .services.session_store import RegenerationSessionStore
+from .services.scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, CaptionScheduler, SchedulerTimeout
+
+FIELDS = ('eventName', 'eventType', 'location', 'speakers', 'keyLearnings', 'length', 'vibe', 'language', 'mode')
+
+MISSING = object()
+
+
+def tearDownModule():
+    # Write what the views buffered while the test database still exists
+    latency_recorder.stop()
+
+# Values around every rule either implementation applies
+INTERESTING_VALUES = [
+    MISSING, None, '', ' ', '  \t\n', 'a', 'ab', 'abc', ' abc ', '!!!', '!!! a', '---',
+    'Tech Summit', 'PyCon India 2024', 'x' * 99, 'x' * 100, 'x' * 101, 'y' * 199, 'y' * 200, 'y' * 201,
+    'z' * 499, 'z' * 500, 'z' * 501, 'one two', 'one two three', 'learned so much', 'ai ml data science',
+    'a\x00b', 'bad \ud800 surrogate', 'émoji 🚀 café', '١٢٣', '_', '__a', 'ß',
+    0, 1, -1, 42, 50, 100, 101, -0, 3.0, 3.5, 1e3, float('nan'), True, False,
+    '0', '1', '50', '100', '101', '-1', ' 42 ', '1.0', '1.00 ', '1.5', '1e2', '0x10', 'abc1', '١٢',
+    '9' * 1000, '9' * 1001,
+    'short', 'medium', 'long', 'Short', ' short', 'english', 'tanglish', 'English', 'auto', 'template',
+    [], ['short'], {}, {'a': 1},
+]
+
+
+def random_payload(rng: random.Random):
+    """A random request body; mostly dicts, sometimes not a mapping at all"""
+    roll = rng.random()
+    if roll < 0.01:
+        return None
+    if roll < 0.03:
+        return rng.choice([[], ['eventName'], 'eventName', 42, True])
+
+    payload = {}
+    valid = {
+        'eventName': 'Tech Innovation Summit', 'eventType': 'Conference', 'location': 'Chennai',
+        'speakers': 'Priya Raman', 'keyLearnings': 'ship small and measure everything',
+        'length': 'short', 'vibe': 70, 'language': 'tanglish', 'mode': 'auto',
+    }
+    for field in FIELDS:
+        value = valid[field] if rng.random() < 0.6 else rng.choice(INTERESTING_VALUES)
+        if value is not MISSING:
+            payload[field] = value
+    return payload
+
+
+def serializer_result(data):
+    serializer = CaptionRequestSerializer(data=data)
+    if serializer.is_valid():
+        return dict(serializer.validated_data), None
+    errors = {
+        key: [str(message) for message in messages] if isinstance(messages, list) else str(messages)
+        for key, messages in serializer.errors.items()
+    }
+    return None, errors
+
+
+class ValidateCaptionRequestTests(SimpleTestCase):
+    """validate_caption_request must accept, reject and report exactly like CaptionRequestSerializer"""
+
+    def assert_same_as_serializer(self, data):
+        expected_data, expected_errors = serializer_result(data)
+        caption_input, errors = validate_caption_request(data)
+
+        if expected_errors is not None:
+            self.assertIsNone(caption_input, f"accepted {data!r}")
+            self.assertEqual(errors, expected_errors, f"for {data!r}")
+            self.assertEqual(list(errors), list(expected_errors), f"error order for {data!r}")
+        else:
+            self.assertIsNone(errors, f"rejected {data!r}")
+            self.assertEqual(dict(caption_input), expected_data, f"for {data!r}")
+
+    def test_valid_payload(self):
+        self.assert_same_as_serializer({
+            'eventName': 'Tech Innovation Summit', 'eventType': 'Conference', 'location': 'Chennai',
+            'speakers': 'Priya Raman', 'keyLearnings': 'ship small and measure everything',
+        })
+
+    def test_non_mapping_payloads(self):
+        for data in (None, [], 'text', 42):
+            with self.subTest(data=data):
+                self.assert_same_as_serializer(data)
+
+    def test_randomised_payloads_match_serializer(self):
+        rng = random.Random(20240601)
+        for _ in range(5000):
+            data = random_payload(rng)
+            with self.subTest(data=data):
+                self.assert_same_as_serializer(data)
+
+    def test_caption_input_is_immutable_mapping(self):
+        caption_input, _ = validate_caption_request({
+            'eventName': 'Tech Innovation Summit', 'eventType': 'Conference', 'location': 'Chennai',
+            'speakers': 'Priya Raman', 'keyLearnings': 'ship small and measure everything',
+        })
+        self.assertEqual(caption_input['eventName'], caption_input.event_name)
+        self.assertEqual(caption_input.get('mode'), 'auto')
+        with self.assertRaises(AttributeError):
+            caption_input.vibe = 10
+
+        changed = caption_input.replace(vibe=90)
+        self.assertIsInstance(changed, CaptionInput)
+        self.assertEqual((changed.vibe, caption_input.vibe), (90, 50))
+        with self.assertRaises(TypeError):
+            caption_input.replace(unknown=1)
+
+
+class LatencyRecorderTests(TestCase):
+    """Buffered samples must reach the database exactly once"""
+
+    def test_flush_merges_into_existing_day(self):
+        day = date(2025, 3, 1)
+        recorder = LatencyRecorder(flush_interval=3600, max_pending=10**6)
+        for i in range(30):
+            recorder.add(day, 1.0, 20, 'short', 'failed' if i % 3 == 0 else 'ok')
+        recorder.flush()
+        recorder.add(day, 4.0, 90, 'long', 'degraded')
+        recorder.flush()
+        recorder.flush()
+
+        analytics = CaptionAnalytics.objects.get(date=day)
+        self.assertEqual(
+            (analytics.total_requests, analytics.successful_requests, analytics.degraded_requests,
+             analytics.failed_requests),
+            (31, 20, 1, 10)
+        )
+        self.assertAlmostEqual(analytics.avg_processing_time, 34.0 / 31)
+        self.assertEqual(CaptionLatencySketch.objects.get(analytics=analytics, dimension='all').count, 31)
+
+        percentiles = latency_percentiles(day, day)
+        self.assertEqual(sorted(percentiles['by_vibe']), ['genz', 'professional'])
+        self.assertEqual(sorted(percentiles['by_length']), ['long', 'short'])
+        self.assertEqual(percentiles['by_outcome']['degraded']['count'], 1)
+
+    def test_stop_writes_from_caller_and_leaves_no_thread(self):
+        day = date(2025, 3, 2)
+        recorder = LatencyRecorder(flush_interval=3600, max_pending=10**6)
+        recorder.add(day, 1.0, 20, 'short', 'ok')
+        thread = recorder._thread
+        recorder.stop()
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(CaptionAnalytics.objects.get(date=day).total_requests, 1)
+
+        recorder.add(day, 2.0, 20, 'short', 'ok')
+        self.assertIsNone(recorder._thread)
+        self.assertEqual(CaptionAnalytics.objects.get(date=day).total_requests, 1)
+        recorder.flush()
+        self.assertEqual(CaptionAnalytics.objects.get(date=day).total_requests, 2)
+
+
+class RegenerationSessionStoreTests(SimpleTestCase):
+    """Sessions are bounded by count and by bytes, on open and on advance"""
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        store = RegenerationSessionStore(max_sessions=100, max_bytes=900)
+        for name in 'abcd':
+            store.open(name, None, 'c' * 100, 'x' * 100)
+        self.assertEqual(store.get_stats()['bytes'], 800)
+
+        store.get('a')
+        store.open('e', None, 'c' * 100, 'x' * 100)
+        self.assertIsNone(store.get('b'))
+        self.assertIsNotNone(store.get('a'))
+
+        session = store.get('c')
+        session.advance(None, 'c' * 100, 'é' * 300)
+        stats = store.get_stats()
+        self.assertLessEqual(stats['bytes'], 900)
+        self.assertEqual(stats['bytes'], sum(s.size for s in store._sessions.values()))
+        self.assertIs(store.get('c'), session)
+
+        store.close('c')
+        session.advance(None, 'c', 'x')
+        self.assertEqual(store.get_stats()['bytes'], sum(s.size for s in store._sessions.values()))
+
+
+COMPRESSED_TEXT = {
+    'speakers': 'Priya Raman, Arjun Iyer',
+    'key_learnings': 'Ship small; measure everything. Vera level learning 🚀',
+    'generated_caption': "Had an amazing time at PyCon India! 🚀\n\nWhat stood out for me:\n✅ Typing pays off\n"
+                         "✅ Benchmarks beat opinions\n\nMore updates coming soon! 📈 #Python #PyConIndia",
+}
+
+
+def raw_columns(request_id):
+    """Stored values of the compressed columns, bypassing the field"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT speakers, key_learnings, generated_caption FROM captions_captionrequest WHERE id = %s",
+            [request_id.hex]
+        )
+        return dict(zip(COMPRESSED_TEXT, cursor.fetchone()))
+
+
+class CompressedTextFieldTests(TestCase):
+    """Text goes in and comes out unchanged; only the stored bytes differ"""
+
+    def create(self, **text):
+        return CaptionRequest.objects.create(
+            event_name='PyCon India', event_type='Conference', location='Chennai', length='short',
+            vibe=50, language='english', processing_time=1.0, **{**COMPRESSED_TEXT, **text}
+        )
+
+    def test_round_trip(self):
+        for text in (COMPRESSED_TEXT, {'speakers': '', 'key_learnings': 'x', 'generated_caption': 'é' * 5000}):
+            with self.subTest(text=text):
+                request = CaptionRequest.objects.get(pk=self.create(**text).pk)
+                stored = {field: getattr(request, field) for field in COMPRESSED_TEXT}
+                self.assertEqual(stored, {**COMPRESSED_TEXT, **text})
+
+    def test_stored_compressed(self):
+        request = self.create()
+        stored = raw_columns(request.pk)
+        for field, value in stored.items():
+            self.assertIsInstance(value, bytes)
+            self.assertEqual(decompress_text(value), COMPRESSED_TEXT[field])
+        self.assertNotEqual(stored['generated_caption'][0], TAG_PLAIN)
+        self.assertLess(len(stored['generated_caption']), len(COMPRESSED_TEXT['generated_caption'].encode('utf-8')))
+
+        caption = CaptionRequest.objects.values_list('generated_caption', flat=True).get(pk=request.pk)
+        self.assertIsInstance(caption, CompressedText)
+        self.assertEqual(str(caption), COMPRESSED_TEXT['generated_caption'])
+
+    def test_untouched_value_saved_as_is(self):
+        request = self.create()
+        stored = raw_columns(request.pk)
+        reloaded = CaptionRequest.objects.get(pk=request.pk)
+        reloaded.vibe = 90
+        reloaded.save()
+        self.assertEqual(raw_columns(request.pk), stored)
+
+    def test_legacy_plain_text_is_readable(self):
+        request = self.create()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE captions_captionrequest SET generated_caption = %s WHERE id = %s",
+                ['Legacy caption', request.pk.hex]
+            )
+        self.assertEqual(CaptionRequest.objects.get(pk=request.pk).generated_caption, 'Legacy caption')
+
+
+class CompressedTextMigrationTests(TransactionTestCase):
+    """0003 compresses existing rows and its reverse restores plain text"""
+
+    before = [('captions', '0002_latency_sketches')]
+    after = [('captions', '0003_compressed_text_fields')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_forward_and_back(self):
+        apps = self.migrate(self.before)
+        request = apps.get_model('captions', 'CaptionRequest').objects.create(
+            event_name='PyCon India', event_type='Conference', location='Chennai', length='short',
+            vibe=50, language='english', processing_time=1.0, **COMPRESSED_TEXT
+        )
+        self.assertEqual(raw_columns(request.pk), COMPRESSED_TEXT)
+
+        self.migrate(self.after)
+        stored = raw_columns(request.pk)
+        self.assertTrue(all(isinstance(value, bytes) for value in stored.values()))
+        self.assertEqual({field: decompress_text(value) for field, value in stored.items()}, COMPRESSED_TEXT)
+
+        self.migrate(self.before)
+        self.assertEqual(raw_columns(request.pk), COMPRESSED_TEXT)
+
+
+class CaptionSchedulerTests(SimpleTestCase):
+    """Order in which waiting requests get the single slot"""
+
+    def wait_for_queue(self, scheduler, depth):
+        deadline = time.monotonic() + 5
+        while scheduler.get_stats()['queued'] < depth:
+            self.assertLess(time.monotonic(), deadline, "request never queued")
+            time.sleep(0.001)
+
+    def enqueue(self, scheduler, order, name, priority):
+        def run():
+            with scheduler.slot(name, priority, 1.0):
+                order.append(name)
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.wait_for_queue(scheduler, len(self.threads) + 1)
+        self.threads.append(thread)
+
+    def run_queue(self, scheduler, *requests, pause=0.0):
+        """Queue `requests` behind a held slot, release it and return the service order"""
+        self.threads, order = [], []
+        holder = scheduler.acquire('holder', PRIORITY_INTERACTIVE, 1.0)
+        for name, priority in requests:
+            self.enqueue(scheduler, order, name, priority)
+            time.sleep(pause)
+        scheduler.release(holder)
+        for thread in self.threads:
+            thread.join(5)
+        return order
+
+    def test_interactive_before_batch(self):
+        scheduler = CaptionScheduler(max_concurrent=1, aging_rate=0.0)
+        order = self.run_queue(scheduler, ('batch', PRIORITY_BATCH), ('interactive', PRIORITY_INTERACTIVE))
+        self.assertEqual(order, ['interactive', 'batch'])
+
+    def test_aging_promotes_waiting_batch_request(self):
+        # The 10 point batch penalty is made up after 10ms of waiting
+        scheduler = CaptionScheduler(max_concurrent=1, aging_rate=1000.0, batch_penalty=10.0)
+        order = self.run_queue(
+            scheduler, ('batch', PRIORITY_BATCH), ('interactive', PRIORITY_INTERACTIVE), pause=0.05
+        )
+        self.assertEqual(order, ['batch', 'interactive'])
+
+    def test_queue_timeout(self):
+        scheduler = CaptionScheduler(max_concurrent=1)
+        holder = scheduler.acquire('holder', PRIORITY_INTERACTIVE, 1.0)
+        with self.assertRaises(SchedulerTimeout):
+            scheduler.acquire('late', PRIORITY_BATCH, 1.0, timeout=0.02)
+        stats = scheduler.get_stats()
+        self.assertEqual((stats['queued'], stats['running'], stats['classes']['batch']['rejected']), (0, 1, 1))
+        scheduler.release(holder)
+        self.assertEqual(scheduler.get_stats()['active_clients'], 0)
+
+    def test_slot_released_on_exception(self):
+        scheduler = CaptionScheduler(max_concurrent=1)
+        with self.assertRaises(ValueError):
+            with scheduler.slot('client', PRIORITY_INTERACTIVE, 1.0):
+                raise ValueError("generation failed")
+        self.assertEqual(scheduler.get_stats()['running'], 0)
+        ticket = scheduler.acquire('client', PRIORITY_INTERACTIVE, 1.0, timeout=0)
+        self.assertEqual(ticket.queue_time, 0.0)
+        scheduler.release(ticket)
+
+
+RENDER_CASES = {
+    'uuid': {'id': uuid.UUID('12345678-1234-5678-1234-567812345678')},
+    'aware datetime': {'at': datetime(2025, 3, 1, 9, 30, 15, 123456, tzinfo=dt_timezone.utc)},
+    'naive datetime': {'at': datetime(2025, 3, 1, 9, 30)},
+    'date and time': {'day': date(2025, 3, 1), 'at': time_of_day(9, 30, 15, 500)},
+    'decimal': {'price': Decimal('12.50'), 'values': [Decimal('0.1'), Decimal('-3')]},
+    'lazy string': {'message': gettext_lazy('Invalid input data provided')},
+    'line separators': {'caption': 'one\u2028two\u2029three', 'emoji': '🚀 café'},
+    'nested': {'a': [1, 2.5, None, True, {'b': 'c'}], 'n': 2 ** 63 - 1},
+    'wide integer': {'n': 2 ** 70},
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Same values (and, without floats, the same bytes) as DRF's JSONRenderer"""
+
+    def test_matches_stock_renderer(self):
+        for name, data in RENDER_CASES.items():
+            with self.subTest(name):
+                fast, stock = FastJSONRenderer().render(data), JSONRenderer().render(data)
+                self.assertEqual(json.loads(fast), json.loads(stock))
+                if name != 'nested':
+                    self.assertEqual(fast, stock)
+
+    def test_line_separators_escaped(self):
+        rendered = FastJSONRenderer().render(RENDER_CASES['line separators'])
+        self.assertNotIn('\u2028'.encode(), rendered)
+        self.assertIn(b'\\u2028', rendered)
+        self.assertIn(b'\\u2029', rendered)
+
+    def test_non_finite_rejected_like_stock(self):
+        for value in (float('nan'), float('inf'), Decimal('NaN'), [1.0, {'x': float('-inf')}]):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError) as stock:
+                    JSONRenderer().render({'value': value})
+                with self.assertRaises(ValueError) as fast:
+                    FastJSONRenderer().render({'value': value})
+                self.assertEqual(str(fast.exception), str(stock.exception))
+
+
+class FastJSONParserTests(SimpleTestCase):
+    """Accepts, returns and rejects exactly what DRF's JSONParser does"""
+
+    def parse(self, parser, raw):
+        try:
+            return 'ok', parser.parse(io.BytesIO(raw))
+        except ParseError as e:
+            return 'error', str(e.detail)
+
+    def test_matches_stock_parser(self):
+        cases = [
+            b'{"eventName": "PyCon", "vibe": 70, "tags": ["a", null, true, 1.5]}',
+            '{"caption": "one\u2028two", "emoji": "🚀"}'.encode(),
+            b'{"n": 123456789012345678901}',
+            b'\xef\xbb\xbf{"a": 1}',
+            b'{"a": NaN}', b'{"a": Infinity}', b'[1, -Infinity]',
+            b'[1,', b'', b'{"a": 1} trailing', b'"\xff"',
+        ]
+        for raw in cases:
+            with self.subTest(raw=raw):
+                self.assertEqual(self.parse(FastJSONParser(), raw), self.parse(JSONParser(), raw))
+
+    def test_bom_and_non_finite_rejected(self):
+        for raw in (b'\xef\xbb\xbf{"a": 1}', b'{"a": NaN}'):
+            with self.subTest(raw=raw):
+                self.assertEqual(self.parse(FastJSONParser(), raw)[0], 'error')
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Negotiation, Vary, and which responses may be compressed"""
+
+    payload = {'caption': 'Had an amazing time at PyCon India! ' * 100}
+
+    def respond(self, accept_encoding='', path='/api/generate-caption/', response=None):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING=accept_encoding)
+        middleware = CompressionMiddleware(lambda request: response or JsonResponse(self.payload))
+        return middleware(request)
+
+    def test_accept_encoding_negotiation(self):
+        cases = {
+            '': None,
+            'identity': None,
+            'gzip': 'gzip',
+            'gzip, deflate, br': 'br',
+            'br;q=0.5, gzip;q=1.0': 'gzip',
+            'br;q=1.0, gzip;q=0.5': 'br',
+            'br;q=0, gzip': 'gzip',
+            'gzip;q=0': None,
+            '*': 'br',
+            '*;q=0.5, br;q=0': 'gzip',
+            'GZIP;Q=1': 'gzip',
+            'gzip;q=bogus': None,
+        }
+        if brotli is None:  # pragma: no cover - optional dependency
+            cases = {header: 'gzip' if encoding == 'br' else encoding for header, encoding in cases.items()}
+        for header, expected in cases.items():
+            with self.subTest(accept_encoding=header):
+                response = self.respond(header)
+                self.assertEqual(response.get('Content-Encoding'), expected)
+                self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_compressed_body_round_trips(self):
+        response = self.respond('gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content)), self.payload)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+
+    def test_only_api_json_without_cookies(self):
+        html = HttpResponse('<input name="csrfmiddlewaretoken" value="secret"> ' * 100)
+        with_cookie = JsonResponse(self.payload)
+        with_cookie.set_cookie('sessionid', 'secret')
+        cases = {
+            'admin html': self.respond('gzip, br', path='/admin/', response=html),
+            'api html': self.respond('gzip, br', response=HttpResponse('<p>x</p>' * 500)),
+            'json outside api': self.respond('gzip, br', path='/admin/jsi18n/'),
+            'json with cookie': self.respond('gzip, br', response=with_cookie),
+        }
+        for name, response in cases.items():
+            with self.subTest(name):
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertNotIn('Accept-Encoding', response.get('Vary', ''))
+
+    def test_small_responses_left_alone(self):
+        response = self.respond('gzip', response=JsonResponse({'ok': True}))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+class FailingModel:
+    def generate_content(self, prompt, **kwargs):
+        raise RuntimeError("quota exceeded")
+
+
+class DegradedCaptionTests(TestCase):
+    """A template served after an upstream failure is recorded as degraded and opens no session"""
+
+    def setUp(self):
+        if views.caption_generator is None:
+            self.skipTest("caption generator not configured")
+        handles = views.caption_generator.router.handles
+        saved = [handle.model for handle in handles]
+        for handle in handles:
+            handle.model = FailingModel()
+        self.addCleanup(lambda: [setattr(handle, 'model', model) for handle, model in zip(handles, saved)])
+
+    def test_upstream_failure(self):
+        response = Client().post('/api/generate-caption/', {
+            'eventName': 'Tech Innovation Summit', 'eventType': 'Conference', 'location': 'Chennai',
+            'speakers': 'Priya Raman', 'keyLearnings': 'ship small and measure everything',
+        }, content_type='application/json')
+
+        data = response.json()
+        self.assertEqual((response.status_code, data['degraded'], data['degraded_reason']), (200, True, 'upstream_error'))
+        self.assertIsNone(data['session_id'])
+
+        request = CaptionRequest.objects.get()
+        self.assertEqual((request.success, request.degraded, request.degraded_reason), (True, True, 'upstream_error'))
+        self.assertIn('Caption generation failed', request.error_message)
+
+        health = Client().get('/api/health/').json()['statistics']
+        self.assertEqual((health['successful_requests'], health['degraded_requests']), (0, 1))
+
+
+
+REPLAY_SCRIPT = """
+import sys
+from django.conf import settings
+settings.DATABASES['default']['NAME'] = sys.argv[1]
+import django
+django.setup()
+from django.core.management import call_command
+from captions.models import CaptionRequest
+call_command('migrate', verbosity=0)
+for i in range(5):
+    CaptionRequest.objects.create(
+        event_name=f'Replay Summit {i}', event_type='Conference', location='Chennai',
+        speakers='Priya Raman', key_learnings='ship small and measure everything', vibe=50,
+        length='short', language='english', generated_caption='Recorded caption', processing_time=0.01,
+    )
+call_command('replay_traffic', '--in-process', '--speedup', '50')
+"""
+
+
+class ReplayTrafficTests(SimpleTestCase):
+    """An in-process replay writes only to its throwaway database, even at exit"""
+
+    def test_in_process_replay_leaves_database_unchanged(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'db.sqlite3')
+            env = dict(os.environ, DJANGO_SETTINGS_MODULE='linkedin_captions.settings',
+                       GEMINI_API_KEY=os.environ.get('GEMINI_API_KEY') or 'test-key')
+            subprocess.run([sys.executable, '-c', REPLAY_SCRIPT, path], cwd=settings.BASE_DIR,
+                           env=env, check=True, capture_output=True, timeout=120)
+
+            with sqlite3.connect(path) as db:
+                counts = [db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] for table in (
+                    'captions_captionrequest', 'captions_captionanalytics', 'captions_captionlatencysketch'
+                )]
+        self.assertEqual(counts, [5, 0, 0])
+
+
+class AnalyticsSummaryTests(TestCase):
+    """'period' keeps its original "N days" form; 'window' has the dates"""
+
+    def test_period_and_window(self):
+        analytics = Client().get('/api/analytics/?start=2025-03-01&end=2025-03-08').json()['analytics']
+        self.assertEqual(analytics['period'], '7 days')
+        self.assertEqual(analytics['window'], {'start': '2025-03-01', 'end': '2025-03-08'})
+        self.assertEqual(Client().get('/api/analytics/').json()['analytics']['period'], '30 days')
+
+
+class TrainCaptionDictionaryTests(SimpleTestCase):
+    """--from-templates rebuilds the shipped v1 dictionary"""
+
+    def test_from_templates_matches_v1(self):
+        out = io.StringIO()
+        call_command('train_caption_dictionary', '--from-templates', stdout=out)
+        self.assertIn('captions_v1.dict matches the caption templates', out.getvalue())
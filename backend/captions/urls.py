@@ -3,6 +3,8 @@ from . import views
 
 urlpatterns = [
     path('generate-caption/', views.generate_caption, name='generate_caption'),
+    path('captions/<uuid:session_id>/refine/', views.refine_caption, name='refine_caption'),
     path('health/', views.health_check, name='health_check'),
+    path('models/', views.model_stats, name='model_stats'),
     path('analytics/', views.analytics_summary, name='analytics_summary'),
 ]
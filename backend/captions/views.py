@@ -1,9 +1,9 @@
-import asyncio
 import logging
 import time
 from datetime import datetime, timezone
 from typing import Dict, Any
 
+from django.conf import settings
 from django.http import JsonResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
@@ -13,8 +13,16 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
 from .models import CaptionRequest, CaptionAnalytics
-from .serializers import CaptionRequestSerializer, CaptionResponseSerializer, HealthCheckSerializer
+from .schemas import validate_caption_request
+from .serializers import CaptionRefineSerializer, HealthCheckSerializer
 from .services.caption_generator import LinkedInCaptionGenerator
+from .services.event_loop import run_coroutine
+from .services.latency_analytics import latency_percentiles, latency_recorder, record_request_latency
+from .services.scheduler import (
+    CaptionScheduler, SchedulerTimeout, estimate_cost,
+    PRIORITY_CLASSES, PRIORITY_INTERACTIVE,
+)
+from .services.session_store import RegenerationSessionStore
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +35,23 @@ except Exception as e:
     caption_generator = None
     logger.error(f"❌ Failed to initialize caption generator: {e}")
 
+# Initialize the request scheduler shared by all requests in this process
+caption_scheduler = CaptionScheduler(
+    max_concurrent=settings.CAPTION_SCHEDULER['MAX_CONCURRENT'],
+    max_queue_wait=settings.CAPTION_SCHEDULER['MAX_QUEUE_WAIT'],
+    aging_rate=settings.CAPTION_SCHEDULER['AGING_RATE'],
+    batch_penalty=settings.CAPTION_SCHEDULER['BATCH_PENALTY'],
+    fairness_weight=settings.CAPTION_SCHEDULER['FAIRNESS_WEIGHT'],
+)
+
+# Regeneration sessions, keyed by the request_id of the first generation
+caption_sessions = RegenerationSessionStore(
+    max_sessions=settings.CAPTION_SESSIONS['MAX_SESSIONS'],
+    ttl=settings.CAPTION_SESSIONS['TTL'],
+    max_turns=settings.CAPTION_SESSIONS['MAX_TURNS'],
+    max_bytes=settings.CAPTION_SESSIONS['MAX_BYTES'],
+)
+
 
 def get_client_ip(request):
     """Get client IP address from request"""
@@ -38,11 +63,49 @@ def get_client_ip(request):
     return ip
 
 
+def get_request_priority(request):
+    """Get scheduling priority class from header or query string"""
+    priority = (
+        request.META.get('HTTP_X_CAPTION_PRIORITY')
+        or request.query_params.get('priority')
+        or PRIORITY_INTERACTIVE
+    ).strip().lower()
+    return priority if priority in PRIORITY_CLASSES else PRIORITY_INTERACTIVE
+
+
 async def run_caption_generation(generator, data: Dict[str, Any]) -> Dict[str, Any]:
     """Run caption generation asynchronously"""
     return await generator.generate_caption(data)
 
 
+def save_caption_request(caption_input, result: Dict[str, Any], processing_time: float, client_ip):
+    """Save a generation to the database for analytics; returns its id or None"""
+    try:
+        caption_request = CaptionRequest.objects.create(
+            event_name=caption_input.event_name,
+            event_type=caption_input.event_type,
+            location=caption_input.location,
+            speakers=caption_input.speakers,
+            key_learnings=caption_input.key_learnings,
+            length=caption_input.length,
+            vibe=caption_input.vibe,
+            language=caption_input.language,
+            generated_caption=result.get('caption', ''),
+            success=result.get('success', False),
+            degraded=result.get('degraded', False),
+            degraded_reason=result.get('degraded_reason') or '',
+            error_message=result.get('error') or result.get('upstream_error', ''),
+            processing_time=processing_time,
+            ip_address=client_ip
+        )
+        logger.info(f"💾 Request saved with ID: {caption_request.id}")
+        record_request_latency(caption_request)
+        return caption_request.id
+    except Exception as e:
+        logger.error(f"Failed to save request to database: {e}")
+        return None
+
+
 @api_view(['POST'])
 def generate_caption(request):
     """
@@ -60,79 +123,91 @@ def generate_caption(request):
                 'debug_message': 'Gemini API not properly configured'
             }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         
-        # Validate request data
-        serializer = CaptionRequestSerializer(data=request.data)
-        if not serializer.is_valid():
-            logger.warning(f"Invalid request data: {serializer.errors}")
+        # Validate request data (single pass; same rules as the caption request serializer)
+        caption_input, validation_errors = validate_caption_request(request.data)
+        if validation_errors:
+            logger.warning(f"Invalid request data: {validation_errors}")
             return Response({
                 'success': False,
                 'error': 'Invalid input data provided',
-                'validation_errors': serializer.errors,
+                'validation_errors': validation_errors,
                 'debug_message': 'Please check all required fields and their formats'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        validated_data = serializer.validated_data
         client_ip = get_client_ip(request)
         
-        logger.info(f"🚀 Starting caption generation for: {validated_data['eventName']}")
+        logger.info(f"🚀 Starting caption generation for: {caption_input.event_name}")
         
-        # Convert camelCase to snake_case for internal processing
-        processed_data = {
-            'eventName': validated_data['eventName'],
-            'eventType': validated_data['eventType'],
-            'location': validated_data['location'],
-            'speakers': validated_data['speakers'],
-            'keyLearnings': validated_data['keyLearnings'],
-            'length': validated_data['length'],
-            'vibe': validated_data['vibe'],
-            'language': validated_data['language']
-        }
-        
-        # Generate caption using asyncio
+        # Template captions are built locally and skip the scheduler;
+        # everything else waits for a generation slot first
+        priority = get_request_priority(request)
+        queue_time = 0.0
+        generation_time = 0.0
         try:
-            result = asyncio.run(run_caption_generation(caption_generator, processed_data))
-        except Exception as e:
-            logger.error(f"Caption generation failed: {e}")
-            result = {
+            if caption_input.mode == 'template':
+                generation_start = time.time()
+                result = caption_generator.compose_template_caption(caption_input, 'requested')
+                generation_time = time.time() - generation_start
+            else:
+                with caption_scheduler.slot(client_ip, priority, estimate_cost(caption_input)) as ticket:
+                    queue_time = ticket.queue_time
+                    generation_start = time.time()
+                    try:
+                        result = run_coroutine(run_caption_generation(caption_generator, caption_input))
+                    except Exception as e:
+                        logger.error(f"Caption generation failed: {e}")
+                        result = {
+                            'success': False,
+                            'error': f'Caption generation failed: {str(e)}',
+                            'processing_time': time.time() - generation_start
+                        }
+                    generation_time = time.time() - generation_start
+        except SchedulerTimeout as e:
+            logger.warning(f"⏳ Request queued too long: {e}")
+            return Response({
                 'success': False,
-                'error': f'Caption generation failed: {str(e)}',
-                'processing_time': time.time() - start_time
-            }
+                'error': 'The caption service is busy. Please try again in a moment.',
+                'processing_time': time.time() - start_time,
+                'queue_time': time.time() - start_time,
+                'debug_message': str(e)
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         
         processing_time = time.time() - start_time
         
         # Save request to database for analytics
-        try:
-            caption_request = CaptionRequest.objects.create(
-                event_name=validated_data['eventName'],
-                event_type=validated_data['eventType'],
-                location=validated_data['location'],
-                speakers=validated_data['speakers'],
-                key_learnings=validated_data['keyLearnings'],
-                length=validated_data['length'],
-                vibe=validated_data['vibe'],
-                language=validated_data['language'],
-                generated_caption=result.get('caption', ''),
-                success=result.get('success', False),
-                error_message=result.get('error', ''),
-                processing_time=processing_time,
-                ip_address=client_ip
-            )
-            request_id = caption_request.id
-            logger.info(f"💾 Request saved with ID: {request_id}")
-        except Exception as e:
-            logger.error(f"Failed to save request to database: {e}")
+        request_id = save_caption_request(caption_input, result, processing_time, client_ip)
         
         # Prepare response
         if result.get('success', False):
-            logger.info(f"✅ Caption generated successfully in {processing_time:.2f}s")
+            # Open a regeneration session so follow-up tweaks only send a delta.
+            # Template captions get none: refining one would just call the
+            # upstream that failed (or was skipped) a moment ago
+            session_id = str(request_id) if request_id and not result.get('degraded') else None
+            if session_id:
+                caption_sessions.open(
+                    session_id, caption_input,
+                    caption_generator.create_session_context(caption_input), result['caption']
+                )
+            logger.info(
+                f"✅ Caption generated successfully in {processing_time:.2f}s "
+                f"(queued {queue_time:.2f}s, generated {generation_time:.2f}s)"
+            )
             response_data = {
                 'success': True,
                 'caption': result.get('caption'),
                 'processing_time': processing_time,
+                'queue_time': queue_time,
+                'generation_time': generation_time,
+                'degraded': result.get('degraded', False),
+                'model': result.get('model'),
+                'routing': result.get('routing'),
+                'prompt_chars': result.get('prompt_chars'),
                 'request_id': str(request_id) if request_id else None,
+                'session_id': session_id,
                 'debug_message': result.get('debug_message', 'Caption generated successfully')
             }
+            if result.get('degraded'):
+                response_data['degraded_reason'] = result.get('degraded_reason')
             return Response(response_data, status=status.HTTP_200_OK)
         else:
             logger.error(f"❌ Caption generation failed: {result.get('error')}")
@@ -140,6 +215,9 @@ def generate_caption(request):
                 'success': False,
                 'error': result.get('error', 'Unknown error occurred'),
                 'processing_time': processing_time,
+                'queue_time': queue_time,
+                'generation_time': generation_time,
+                'routing': result.get('routing'),
                 'request_id': str(request_id) if request_id else None,
                 'debug_message': result.get('debug_message', 'Caption generation failed')
             }
@@ -158,6 +236,135 @@ def generate_caption(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+def refine_caption(request, session_id):
+    """
+    Refine a generated caption (new vibe/length/language or a free-form tweak)
+    """
+    start_time = time.time()
+    
+    try:
+        if not caption_generator:
+            return Response({
+                'success': False,
+                'error': 'Caption generation service is not available. Please check server configuration.',
+                'debug_message': 'Gemini API not properly configured'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+        serializer = CaptionRefineSerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.warning(f"Invalid refinement data: {serializer.errors}")
+            return Response({
+                'success': False,
+                'error': 'Invalid input data provided',
+                'validation_errors': serializer.errors,
+                'debug_message': 'Please check the refinement fields and their formats'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        session = caption_sessions.get(str(session_id))
+        if session is None:
+            # Sessions are held in memory by the worker that generated the
+            # caption; expired, evicted and other-worker sessions all land here
+            return Response({
+                'success': False,
+                'error': 'Regeneration session not found or expired. Please generate a new caption.',
+                'error_code': 'session_not_found',
+                'session_id': str(session_id),
+                'debug_message': 'Sessions are kept in memory per server process; this one may have '
+                                 'expired, been evicted or belong to another worker'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        if session.turns >= caption_sessions.max_turns:
+            return Response({
+                'success': False,
+                'error': f'This caption has reached the limit of {caption_sessions.max_turns} refinements. '
+                         'Please generate a new caption.',
+                'session_id': str(session_id),
+                'turn': session.turns
+            }, status=status.HTTP_409_CONFLICT)
+        
+        # Refinements of one session build on each other, so run them one at a time
+        if not session.lock.acquire(blocking=False):
+            return Response({
+                'success': False,
+                'error': 'A refinement of this caption is already in progress.',
+                'session_id': str(session_id)
+            }, status=status.HTTP_409_CONFLICT)
+        
+        try:
+            changes = {
+                field: serializer.validated_data[field]
+                for field in ('length', 'vibe', 'language') if field in serializer.validated_data
+            }
+            caption_input = session.caption_input.replace(**changes)
+            instruction = serializer.validated_data.get('instruction', '').strip()
+            client_ip = get_client_ip(request)
+            
+            logger.info(f"✏️ Refining caption for: {caption_input.event_name} (turn {session.turns + 1})")
+            
+            queue_time = 0.0
+            generation_time = 0.0
+            try:
+                with caption_scheduler.slot(client_ip, get_request_priority(request),
+                                            estimate_cost(caption_input)) as ticket:
+                    queue_time = ticket.queue_time
+                    generation_start = time.time()
+                    result = run_coroutine(caption_generator.refine_caption(session, caption_input, instruction))
+                    generation_time = time.time() - generation_start
+            except SchedulerTimeout as e:
+                logger.warning(f"⏳ Refinement queued too long: {e}")
+                return Response({
+                    'success': False,
+                    'error': 'The caption service is busy. Please try again in a moment.',
+                    'processing_time': time.time() - start_time,
+                    'queue_time': time.time() - start_time,
+                    'session_id': str(session_id),
+                    'debug_message': str(e)
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            
+            processing_time = time.time() - start_time
+            request_id = save_caption_request(caption_input, result, processing_time, client_ip)
+            
+            response_data = {
+                'success': result.get('success', False),
+                'processing_time': processing_time,
+                'queue_time': queue_time,
+                'generation_time': generation_time,
+                'routing': result.get('routing'),
+                'request_id': str(request_id) if request_id else None,
+                'session_id': str(session_id),
+                'turn': session.turns,
+                'debug_message': result.get('debug_message')
+            }
+            
+            if result.get('success', False):
+                logger.info(f"✅ Caption refined successfully in {processing_time:.2f}s")
+                response_data.update({
+                    'caption': result.get('caption'),
+                    'degraded': False,
+                    'model': result.get('model'),
+                    'prompt_chars': result.get('prompt_chars'),
+                })
+                return Response(response_data, status=status.HTTP_200_OK)
+            
+            logger.error(f"❌ Caption refinement failed: {result.get('error')}")
+            response_data['error'] = result.get('error', 'Unknown error occurred')
+            return Response(response_data, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        finally:
+            session.lock.release()
+    
+    except Exception as e:
+        processing_time = time.time() - start_time
+        logger.error(f"🔥 Unexpected error in refine_caption: {e}")
+        
+        return Response({
+            'success': False,
+            'error': f"Unexpected error: {str(e)}",
+            'processing_time': processing_time,
+            'debug_message': 'An unexpected server error occurred'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET'])
 def health_check(request):
     """
@@ -181,11 +388,14 @@ def health_check(request):
         # Get recent statistics
         try:
             total_requests = CaptionRequest.objects.count()
-            successful_requests = CaptionRequest.objects.filter(success=True).count()
+            # Template captions served in place of the model are not successes
+            successful_requests = CaptionRequest.objects.filter(success=True, degraded=False).count()
+            degraded_requests = CaptionRequest.objects.filter(degraded=True).count()
             success_rate = (successful_requests / total_requests * 100) if total_requests > 0 else 0
         except Exception:
             total_requests = 0
             successful_requests = 0
+            degraded_requests = 0
             success_rate = 0
         
         health_data = {
@@ -199,8 +409,12 @@ def health_check(request):
             'statistics': {
                 'total_requests': total_requests,
                 'successful_requests': successful_requests,
+                'degraded_requests': degraded_requests,
                 'success_rate': f"{success_rate:.1f}%"
-            }
+            },
+            'scheduler': caption_scheduler.get_stats(),
+            'sessions': caption_sessions.get_stats(),
+            'models': caption_generator.router.get_stats()['models'] if caption_generator else {}
         }
         
         logger.info(f"💚 Health check performed: {overall_status}")
@@ -221,6 +435,23 @@ def health_check(request):
         }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
 
+@api_view(['GET'])
+def model_stats(request):
+    """
+    Per-model latency/error profile and recent routing decisions
+    """
+    if not caption_generator:
+        return Response({
+            'success': False,
+            'error': 'Caption generation service is not available. Please check server configuration.'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    
+    return Response({
+        'success': True,
+        'router': caption_generator.router.get_stats()
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 def analytics_summary(request):
     """
@@ -230,16 +461,35 @@ def analytics_summary(request):
         from django.db.models import Avg, Count
         from datetime import date, timedelta
         
-        # Get statistics for the last 30 days
-        thirty_days_ago = date.today() - timedelta(days=30)
+        # Window defaults to the last 30 days; ?days=N or ?start=&end= (YYYY-MM-DD)
+        try:
+            days = int(request.query_params.get('days', 30))
+            end_date = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else None
+            start_date = (
+                date.fromisoformat(request.query_params['start']) if 'start' in request.query_params
+                else (end_date or date.today()) - timedelta(days=days)
+            )
+        except ValueError as e:
+            return Response({
+                'success': False,
+                'error': f'Invalid analytics window: {str(e)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
+        latency_recorder.flush()
         recent_requests = CaptionRequest.objects.filter(
-            created_at__date__gte=thirty_days_ago
+            created_at__date__gte=start_date
         )
+        if end_date:
+            recent_requests = recent_requests.filter(created_at__date__lte=end_date)
         
         analytics = {
             'total_requests': recent_requests.count(),
-            'successful_requests': recent_requests.filter(success=True).count(),
+            'successful_requests': recent_requests.filter(success=True, degraded=False).count(),
+            'degraded_requests': recent_requests.filter(degraded=True).count(),
+            'degraded_reasons': dict(
+                recent_requests.filter(degraded=True).values_list('degraded_reason')
+                .annotate(count=Count('id')).order_by()
+            ),
             'failed_requests': recent_requests.filter(success=False).count(),
             'avg_processing_time': recent_requests.aggregate(
                 avg_time=Avg('processing_time')
@@ -254,7 +504,15 @@ def analytics_summary(request):
                 .annotate(count=Count('vibe'))
                 .order_by('-count')[:5]
             ),
-            'period': '30 days'
+            # Merged from per-day sketches, no raw-row scan; samples buffered
+            # by other workers show up within CAPTION_ANALYTICS FLUSH_INTERVAL
+            'latency_percentiles': latency_percentiles(start_date, end_date),
+            # Kept as "N days" for existing clients; 'window' has the exact dates
+            'period': f"{((end_date or date.today()) - start_date).days} days",
+            'window': {
+                'start': start_date.isoformat(),
+                'end': (end_date or date.today()).isoformat(),
+            },
         }
         
         return Response({
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'captions.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -97,19 +98,84 @@ CORS_ALLOW_CREDENTIALS = True
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'captions.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'captions.parsers.FastJSONParser',
     ],
 }
 
+# Response compression (brotli when available, otherwise gzip); only JSON
+# responses under PATH_PREFIX that set no cookies are compressed (BREACH)
+RESPONSE_COMPRESSION = {
+    'MIN_SIZE': int(os.getenv('RESPONSE_COMPRESSION_MIN_SIZE', '1024')),
+    'PATH_PREFIX': os.getenv('RESPONSE_COMPRESSION_PATH_PREFIX', '/api/'),
+    'BROTLI_QUALITY': int(os.getenv('RESPONSE_COMPRESSION_BROTLI_QUALITY', '4')),
+}
+
 # Gemini API Settings
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 if not GEMINI_API_KEY:
     print("⚠️  Warning: GEMINI_API_KEY not found in environment variables")
     print("   Please create a .env file with your Gemini API key")
 
+# Models to route caption requests across, in order of preference
+GEMINI_MODELS = [
+    name.strip() for name in os.getenv('GEMINI_MODELS', 'gemini-1.5-flash').split(',') if name.strip()
+]
+
+# Model router: per-length latency budgets (seconds), per-attempt timeout
+# and the rolling window used to profile each model
+CAPTION_ROUTER = {
+    'LATENCY_BUDGETS': {
+        'short': float(os.getenv('CAPTION_BUDGET_SHORT', '8')),
+        'medium': float(os.getenv('CAPTION_BUDGET_MEDIUM', '12')),
+        'long': float(os.getenv('CAPTION_BUDGET_LONG', '20')),
+    },
+    'MODEL_TIMEOUT': float(os.getenv('CAPTION_MODEL_TIMEOUT', '15')),
+    'WINDOW': int(os.getenv('CAPTION_ROUTER_WINDOW', '50')),
+    'SAMPLE_TTL': float(os.getenv('CAPTION_ROUTER_SAMPLE_TTL', '300')),
+    'MAX_ERROR_RATE': float(os.getenv('CAPTION_ROUTER_MAX_ERROR_RATE', '0.5')),
+    'MIN_SAMPLES': int(os.getenv('CAPTION_ROUTER_MIN_SAMPLES', '5')),
+    # Await the Gemini async client on the shared background event loop
+    # instead of running the blocking client on a thread pool
+    'NATIVE_ASYNC': os.getenv('CAPTION_NATIVE_ASYNC', 'True').lower() == 'true',
+}
+
+# Degraded mode: serve an instant template caption when the AI model errors
+# or takes longer than the latency SLO (seconds)
+CAPTION_DEGRADED_MODE = {
+    'ENABLED': os.getenv('CAPTION_DEGRADED_MODE', 'True').lower() == 'true',
+    'LATENCY_SLO': float(os.getenv('CAPTION_LATENCY_SLO', '20')),
+}
+
+# Caption request scheduler (per process; needs threaded workers, e.g.
+# gunicorn --worker-class gthread --threads 8, to queue and prioritise)
+CAPTION_SCHEDULER = {
+    'MAX_CONCURRENT': int(os.getenv('CAPTION_MAX_CONCURRENT', '4')),
+    'MAX_QUEUE_WAIT': float(os.getenv('CAPTION_MAX_QUEUE_WAIT', '30')),
+    'AGING_RATE': float(os.getenv('CAPTION_QUEUE_AGING_RATE', '1.0')),
+    'BATCH_PENALTY': float(os.getenv('CAPTION_BATCH_PENALTY', '10.0')),
+    'FAIRNESS_WEIGHT': float(os.getenv('CAPTION_FAIRNESS_WEIGHT', '1.0')),
+}
+
+# Regeneration sessions (per process): how many are kept in memory, the
+# bytes of context and captions they may hold, idle TTL (seconds) and the
+# number of refinements allowed per session
+CAPTION_SESSIONS = {
+    'MAX_SESSIONS': int(os.getenv('CAPTION_SESSION_MAX', '1000')),
+    'MAX_BYTES': int(os.getenv('CAPTION_SESSION_MAX_BYTES', '8000000')),
+    'TTL': float(os.getenv('CAPTION_SESSION_TTL', '1800')),
+    'MAX_TURNS': int(os.getenv('CAPTION_SESSION_MAX_TURNS', '10')),
+}
+
+# Latency analytics: samples are buffered per process and written every
+# FLUSH_INTERVAL seconds, or once FLUSH_BATCH samples are pending
+CAPTION_ANALYTICS = {
+    'FLUSH_INTERVAL': float(os.getenv('CAPTION_ANALYTICS_FLUSH_INTERVAL', '5')),
+    'FLUSH_BATCH': int(os.getenv('CAPTION_ANALYTICS_FLUSH_BATCH', '200')),
+}
+
 # Logging configuration
 LOGGING = {
     'version': 1,